@@ -0,0 +1,267 @@
+"""Local stand-in for the parts of the Apify platform the pipeline uses."""
+import asyncio
+import itertools
+import logging
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fixtures import fixture_items
+
+
+@dataclass
+class ActorStats:
+    """Calls made to one fake actor and the time they took."""
+    calls: int = 0
+    failures: int = 0
+    aborted: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    items_listed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "aborted": self.aborted,
+            "seconds": round(self.seconds, 3),
+            "max_seconds": round(self.max_seconds, 3),
+            "items_listed": self.items_listed,
+        }
+
+
+@dataclass
+class FakeRun:
+    id: str
+    default_dataset_id: str
+    status: str = "SUCCEEDED"
+
+
+@dataclass
+class FakeListPage:
+    items: List[Dict[str, Any]]
+    offset: int
+    limit: int
+    total: int
+    count: int = 0
+
+    def __post_init__(self):
+        self.count = len(self.items)
+
+
+class FakeDatasetClient:
+    def __init__(self, platform: "FakeActor", run_id: str):
+        self.platform = platform
+        self.run_id = run_id
+        self.actor_id = platform.runs[run_id][0]
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        # A running run has pushed the share of its items matching its progress
+        return self.platform.produced(self.run_id)
+
+    async def list_items(self, offset: int = 0, limit: Optional[int] = None, fields: Optional[List[str]] = None, **kwargs):
+        await asyncio.sleep(self.platform.page_latency)
+        items = self.items
+        end = len(items) if limit is None else offset + limit
+        page = items[offset:end]
+        if fields:
+            page = [{key: item[key] for key in fields if key in item} for item in page]
+        self.platform.stats_for(self.actor_id).items_listed += len(page)
+        return FakeListPage(items=page, offset=offset, limit=limit or len(page), total=len(items))
+
+    async def iterate_items(self, **kwargs):
+        for item in self.items:
+            yield item
+
+
+class FakeRunClient:
+    def __init__(self, platform: "FakeActor", run_id: str):
+        self.platform = platform
+        self.run_id = run_id
+
+    async def get(self) -> Dict[str, Any]:
+        return {"id": self.run_id, **self.platform.run_info[self.run_id]}
+
+    async def wait_for_finish(self, wait_secs: Optional[int] = None) -> Dict[str, Any]:
+        finishing = self.platform.finishing.get(self.run_id)
+        if finishing is not None:
+            # asyncio.wait leaves the run going when a waiter gives up
+            await asyncio.wait([finishing], timeout=wait_secs)
+        return {"id": self.run_id, **self.platform.run_info[self.run_id]}
+
+    async def abort(self) -> Dict[str, Any]:
+        finishing = self.platform.finishing.get(self.run_id)
+        if finishing is not None and not finishing.done():
+            finishing.cancel()
+            actor_id, _ = self.platform.runs[self.run_id]
+            self.platform.stats_for(actor_id).aborted += 1
+            self.platform.stop(self.run_id, "ABORTED")
+        return {"id": self.run_id, **self.platform.run_info[self.run_id]}
+
+    def dataset(self) -> FakeDatasetClient:
+        return FakeDatasetClient(self.platform, self.run_id)
+
+
+class FakeApifyClient:
+    def __init__(self, platform: "FakeActor"):
+        self.platform = platform
+
+    def run(self, run_id: str) -> FakeRunClient:
+        return FakeRunClient(self.platform, run_id)
+
+
+class FakeKeyValueStore:
+    def __init__(self):
+        self.records: Dict[str, Any] = {}
+
+    async def get_value(self, key: str, default_value: Any = None) -> Any:
+        return self.records.get(key, default_value)
+
+    async def set_value(self, key: str, value: Any, content_type: Optional[str] = None) -> None:
+        if value is None:
+            self.records.pop(key, None)
+        else:
+            self.records[key] = value
+
+
+@dataclass
+class FakeActor:
+    """
+    Fake ``Actor`` serving fixture datasets with configurable latency.
+
+    Attributes:
+        latency: Mean seconds an actor run takes
+        jitter: Runs take ``latency`` plus or minus up to this fraction of it
+        page_latency: Seconds per ``list_items`` page request
+        failure_rate: Probability that a run fails
+        straggler_rate: Probability that a run is a straggler
+        straggler_factor: How many times longer than usual stragglers take
+        items_per_run: Dataset items produced by each run
+        latencies: Per actor ID overrides of ``latency``
+        seed: Seed for jitter, failures and fixture content
+    """
+    latency: float = 0.5
+    jitter: float = 0.2
+    page_latency: float = 0.01
+    failure_rate: float = 0.0
+    straggler_rate: float = 0.0
+    straggler_factor: float = 10.0
+    items_per_run: int = 50
+    latencies: Dict[str, float] = field(default_factory=dict)
+    seed: int = 0
+
+    def __post_init__(self):
+        self.log = logging.getLogger("benchmarks.actor")
+        self.apify_client = FakeApifyClient(self)
+        self.runs: Dict[str, Any] = {}
+        self.run_info: Dict[str, Dict[str, Any]] = {}
+        self.finishing: Dict[str, asyncio.Future] = {}
+        self.stats: Dict[str, ActorStats] = {}
+        self.pushed: List[Dict[str, Any]] = []
+        self.key_value_stores: Dict[Optional[str], FakeKeyValueStore] = {}
+        self.listeners: Dict[Any, List[Any]] = {}
+        self._rng = random.Random(self.seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def stats_for(self, actor_id: str) -> ActorStats:
+        with self._lock:
+            return self.stats.setdefault(actor_id, ActorStats())
+
+    async def start(
+        self,
+        actor_id: str,
+        run_input: Optional[Dict[str, Any]] = None,
+        timeout: Optional[timedelta] = None,
+        **kwargs
+    ) -> FakeRun:
+        """
+        Start a run that finishes in the background after its latency.
+
+        A run slower than ``timeout`` times out, keeping the share of its
+        items it produced until then, just like an aborted run.
+        """
+        self.stats_for(actor_id).calls += 1
+        with self._lock:
+            latency = self.latencies.get(actor_id, self.latency)
+            latency *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+            if self._rng.random() < self.straggler_rate:
+                latency *= self.straggler_factor
+            failed = self._rng.random() < self.failure_rate
+
+        run_id = f"run-{next(self._ids)}"
+        items = fixture_items(actor_id, run_input or {}, self.items_per_run, self.seed)
+        self.runs[run_id] = (actor_id, items)
+        self.run_info[run_id] = {"startedAt": datetime.now(timezone.utc), "status": "RUNNING", "latency": latency}
+        limit = timeout.total_seconds() if timeout is not None else None
+        self.finishing[run_id] = asyncio.ensure_future(self._finish(run_id, actor_id, latency, failed, limit))
+        return FakeRun(id=run_id, default_dataset_id=f"dataset-{run_id}", status="RUNNING")
+
+    async def _finish(self, run_id: str, actor_id: str, latency: float, failed: bool, limit: Optional[float]) -> None:
+        timed_out = limit is not None and latency > limit
+        seconds = limit if timed_out else latency
+        await asyncio.sleep(seconds)
+        stats = self.stats_for(actor_id)
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        if timed_out:
+            self.stop(run_id, "TIMED-OUT")
+            return
+        info = self.run_info[run_id]
+        info["finishedAt"] = info["startedAt"] + timedelta(seconds=latency)
+        info["status"] = "FAILED" if failed else "SUCCEEDED"
+        if failed:
+            stats.failures += 1
+
+    def produced(self, run_id: str) -> List[Dict[str, Any]]:
+        """The items a run has pushed so far, in proportion to its progress while running."""
+        actor_id, items = self.runs[run_id]
+        info = self.run_info[run_id]
+        if info["status"] != "RUNNING":
+            return items
+        elapsed = (datetime.now(timezone.utc) - info["startedAt"]).total_seconds()
+        return items[:int(len(items) * min(elapsed / max(info["latency"], 1e-9), 1.0))]
+
+    def stop(self, run_id: str, status: str) -> None:
+        """End a run early, keeping the items it produced so far."""
+        actor_id, _ = self.runs[run_id]
+        self.runs[run_id] = (actor_id, self.produced(run_id))
+        info = self.run_info[run_id]
+        info["finishedAt"] = datetime.now(timezone.utc)
+        info["status"] = status
+
+    async def call(self, actor_id: str, run_input: Optional[Dict[str, Any]] = None, **kwargs) -> FakeRun:
+        """Start a run and wait for it, like ``Actor.call``."""
+        run = await self.start(actor_id, run_input, **kwargs)
+        finished = await self.apify_client.run(run.id).wait_for_finish()
+        run.status = finished["status"]
+        return run
+
+    async def push_data(self, data: Any) -> None:
+        self.pushed.extend(data if isinstance(data, list) else [data])
+
+    async def get_value(self, key: str, default_value: Any = None) -> Any:
+        return await (await self.open_key_value_store()).get_value(key, default_value)
+
+    async def set_value(self, key: str, value: Any, content_type: Optional[str] = None) -> None:
+        await (await self.open_key_value_store()).set_value(key, value, content_type)
+
+    def on(self, event: Any, listener) -> None:
+        """Register a platform event listener; call ``emit`` to trigger it."""
+        self.listeners.setdefault(event, []).append(listener)
+
+    async def emit(self, event: Any, data: Any = None) -> None:
+        for listener in self.listeners.get(event, []):
+            await listener(data)
+
+    async def charge(self, event_name: str, count: int = 1) -> None:
+        pass
+
+    async def open_key_value_store(self, *, name: Optional[str] = None, **kwargs) -> FakeKeyValueStore:
+        return self.key_value_stores.setdefault(name, FakeKeyValueStore())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {actor_id: stats.to_dict() for actor_id, stats in sorted(self.stats.items())}
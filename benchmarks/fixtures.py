@@ -0,0 +1,164 @@
+"""Synthetic dataset items for the five scraper actors used in ``src/tools``."""
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+GOOGLE_NEWS = "aymorato/super-fast-google-news-scraper-pay-per-result"
+GOOGLE_SEARCH = "apify/google-search-scraper"
+REDDIT = "trudax/reddit-scraper-lite"
+TWITTER = "apidojo/twitter-scraper-lite"
+YOUTUBE = "streamers/youtube-scraper"
+
+# Run input fields holding the search terms of each actor
+_QUERY_FIELDS = ("keywords", "queries", "searches", "searchTerms", "searchQueries")
+
+_HEADLINES = [
+    "{q} startup raises new funding round to expand its platform",
+    "Researchers publish open benchmark results for {q}",
+    "Big tech companies race to ship {q} features this quarter",
+    "Why enterprises are cautious about adopting {q}",
+    "Open source {q} framework reaches its first stable release",
+    "Regulators weigh new rules that would affect {q}",
+    "Hands-on review of the latest {q} developer tools",
+    "Analysts expect {q} spending to double next year",
+]
+_FILLER = (
+    "The announcement follows months of speculation and comes as competitors "
+    "ship similar products. Early users report mixed results, citing cost, "
+    "reliability and integration work as the main hurdles."
+)
+
+
+def queries_of(run_input: Dict[str, Any]) -> List[str]:
+    """The search terms of a run input, whatever the actor calls them."""
+    for field in _QUERY_FIELDS:
+        value = run_input.get(field)
+        if value:
+            queries = value if isinstance(value, list) else str(value).splitlines()
+            return [query.strip() for query in queries if query.strip()]
+    return ["benchmark topic"]
+
+
+def _story(rng: random.Random, query: str, index: int) -> Dict[str, Any]:
+    # Stories are drawn from a small pool so sources overlap like real results do
+    headline = _HEADLINES[index % len(_HEADLINES)].format(q=query[:60])
+    return {
+        "headline": headline,
+        "body": f"{headline}. {_FILLER}",
+        "slug": f"{index % len(_HEADLINES)}-{rng.randrange(10 ** 6)}",
+        "timestamp": time.time() - rng.uniform(0, 30 * 86400),
+    }
+
+
+def _google_news(rng, query, count):
+    items = []
+    for index in range(count):
+        story = _story(rng, query, index)
+        items.append({
+            "title": story["headline"],
+            "link": f"https://news.example.com/{story['slug']}",
+            "source": {"name": rng.choice(["Example Times", "Tech Daily", "Wire"])},
+            "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(story["timestamp"])),
+            "description": story["body"],
+            "keyword": query,
+            "image": "x" * 2000,
+        })
+    return items
+
+
+def _google_search(rng, query, count):
+    results = []
+    for index in range(count):
+        story = _story(rng, query, index + 3)
+        results.append({
+            "title": story["headline"],
+            "url": f"https://www.site{index}.example.org/{story['slug']}?utm_source=bench",
+            "displayedUrl": f"site{index}.example.org",
+            "description": story["body"],
+            "date": time.strftime("%Y-%m-%d", time.gmtime(story["timestamp"])),
+            "emphasizedKeywords": query.split(),
+        })
+    return [{"searchQuery": {"term": query}, "organicResults": results, "html": "x" * 20000}]
+
+
+def _reddit(rng, query, count):
+    items = []
+    for index in range(count):
+        story = _story(rng, query, index + 1)
+        items.append({
+            "id": f"t3_{story['slug']}",
+            "url": f"https://www.reddit.com/r/example/comments/{story['slug']}/",
+            "username": f"user{rng.randrange(1000)}",
+            "title": story["headline"],
+            "body": story["body"] * 3,
+            "communityName": "r/example",
+            "upVotes": rng.randrange(5000),
+            "numberOfComments": rng.randrange(500),
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(story["timestamp"])),
+            "dataType": "post",
+        })
+    return items
+
+
+def _twitter(rng, query, count):
+    items = []
+    for index in range(count):
+        story = _story(rng, query, index + 2)
+        items.append({
+            "id": story["slug"],
+            "url": f"https://x.com/example/status/{rng.randrange(10 ** 12)}",
+            "text": f"{story['headline']} #{query.split()[0] if query.split() else 'ai'}",
+            "author": {"userName": f"handle{rng.randrange(1000)}", "followers": rng.randrange(10 ** 5)},
+            "likeCount": rng.randrange(10000),
+            "retweetCount": rng.randrange(2000),
+            "replyCount": rng.randrange(500),
+            "createdAt": time.strftime("%a %b %d %H:%M:%S +0000 %Y", time.gmtime(story["timestamp"])),
+        })
+    return items
+
+
+def _youtube(rng, query, count):
+    items = []
+    for index in range(count):
+        story = _story(rng, query, index + 4)
+        items.append({
+            "id": story["slug"],
+            "title": story["headline"],
+            "url": f"https://www.youtube.com/watch?v={story['slug']}",
+            "channelName": f"Channel {rng.randrange(100)}",
+            "text": story["body"] * 2,
+            "viewCount": rng.randrange(10 ** 6),
+            "likes": rng.randrange(10 ** 4),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(story["timestamp"])),
+            "duration": "00:12:34",
+            "subtitles": "x" * 5000,
+        })
+    return items
+
+
+FIXTURES: Dict[str, Callable[[random.Random, str, int], List[Dict[str, Any]]]] = {
+    GOOGLE_NEWS: _google_news,
+    GOOGLE_SEARCH: _google_search,
+    REDDIT: _reddit,
+    TWITTER: _twitter,
+    YOUTUBE: _youtube,
+}
+
+
+def fixture_items(actor_id: str, run_input: Dict[str, Any], count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Dataset items an actor run would produce for a run input.
+
+    Every query of the run input gets ``count`` items, tagged with the query
+    the way the real actors do. Items carry the fields the tools read plus
+    some heavy fields they do not, so projection and byte caps are exercised.
+    The same arguments always give the same items, apart from timestamps
+    relative to now.
+    """
+    if actor_id not in FIXTURES:
+        raise KeyError(f"No fixture for actor '{actor_id}'")
+    items = []
+    for query in queries_of(run_input):
+        rng = random.Random(f"{seed}:{actor_id}:{query}")
+        items.extend(FIXTURES[actor_id](rng, query, count))
+    return items
@@ -0,0 +1,180 @@
+"""Benchmark scenarios run against the fake platform and stub LLM."""
+import asyncio
+import functools
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from crewai import Crew
+
+from benchmarks.fake_platform import FakeActor
+from benchmarks.stub_llm import StubLLM
+from src.agents.editor import EditorAgent
+from src.agents.researcher import ResearcherAgent
+from src.agents.writer import WriterAgent
+from src.dag import StageMemo
+from src.metrics import MetricsRecorder, recording
+from src.newsletter_crew import NewsletterCrew
+from src.tools.base import bind_event_loop
+
+# (owner, attribute, stage name) of the calls timed as pipeline stages
+STAGES = [
+    (ResearcherAgent, "research_topic", "research"),
+    (ResearcherAgent, "_summarize", "summarize"),
+    (NewsletterCrew, "pack_research", "pack"),
+    (WriterAgent, "create_section_content", "write_section"),
+    (EditorAgent, "review_content", "review"),
+    (EditorAgent, "polish", "polish"),
+    (Crew, "kickoff", "crew_kickoff"),
+]
+
+
+class StageTimer:
+    """Accumulates call counts and wall time per stage across threads."""
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def wrap(self, stage: str, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    @contextmanager
+    def patched(self, stages=STAGES):
+        """Time the given stages for the duration of the block."""
+        originals = []
+        for owner, name, stage in stages:
+            original = owner.__dict__[name]
+            originals.append((owner, name, original))
+            if isinstance(original, staticmethod):
+                setattr(owner, name, staticmethod(self.wrap(stage, original.__func__)))
+            else:
+                setattr(owner, name, self.wrap(stage, original))
+        try:
+            yield self
+        finally:
+            for owner, name, original in originals:
+                setattr(owner, name, original)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {key: round(value, 3) if isinstance(value, float) else value for key, value in entry.items()}
+                for stage, entry in self.stages.items()
+            }
+
+
+async def run_scenario(
+    name: str,
+    topics: List[str],
+    mode: str = "fast",
+    concurrency: int = 3,
+    platform: Optional[Dict[str, Any]] = None,
+    llm: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Generate newsletters for ``topics`` the way ``src.main`` does and measure it.
+
+    Args:
+        name: Scenario name used in the report
+        topics: Topics to generate newsletters for
+        mode: Generation mode passed to ``NewsletterCrew``
+        concurrency: Topics generated at the same time
+        platform: Keyword arguments for ``FakeActor``
+        llm: Keyword arguments for ``StubLLM``
+
+    Returns:
+        Report with end-to-end and per-topic latency, per-stage timings, the
+        pipeline's own span summary, fake actor and LLM statistics and peak
+        traced memory
+    """
+    actor = FakeActor(**(platform or {}))
+    stub_llm = StubLLM(**(llm or {}))
+    timer = StageTimer()
+    semaphore = asyncio.Semaphore(concurrency)
+    bind_event_loop()
+
+    metrics = MetricsRecorder()
+    stage_memo = StageMemo() if mode == "memoized" else None
+
+    async def generate(topic: str) -> float:
+        async with semaphore:
+            with recording(metrics):
+                crew = NewsletterCrew(actor, llm=stub_llm, mode=mode, stage_memo=stage_memo)
+                start = time.perf_counter()
+                await asyncio.to_thread(crew.process_user_input, topic)
+                return time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with timer.patched():
+        results = await asyncio.gather(*(generate(topic) for topic in topics), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [result for result in results if not isinstance(result, BaseException)]
+    errors = [repr(result) for result in results if isinstance(result, BaseException)]
+    return {
+        "scenario": name,
+        "mode": mode,
+        "topics": len(topics),
+        "concurrency": concurrency,
+        "end_to_end_seconds": round(elapsed, 3),
+        "topic_seconds": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else None,
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+        "stages": timer.report(),
+        "spans": metrics.summary()["spans"],
+        "scrapes": actor.report(),
+        "llm": stub_llm.report(),
+        "errors": errors,
+    }
+
+
+def scenarios(batch_size: int) -> Dict[str, List[str]]:
+    """Topics for the built-in scenarios."""
+    return {
+        "single": ["AI agents"],
+        "batch": [f"AI agents topic {index}" for index in range(batch_size)],
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of ``report`` against ``baseline``.
+
+    A scenario regresses when its end-to-end latency or peak memory exceeds
+    the baseline by more than ``tolerance`` (a fraction, e.g. 0.2 for 20%).
+    """
+    regressions = []
+    previous = {entry["scenario"]: entry for entry in baseline.get("results", [])}
+    for entry in report["results"]:
+        old = previous.get(entry["scenario"])
+        if old is None:
+            continue
+        for metric in ("end_to_end_seconds", "peak_memory_mb"):
+            if old[metric] and entry[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{entry['scenario']}: {metric} {entry[metric]} vs baseline {old[metric]}"
+                )
+    return regressions
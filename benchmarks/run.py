@@ -0,0 +1,96 @@
+"""
+Run the offline benchmarks.
+
+Usage:
+    python -m benchmarks.run [--scenario single|batch|all] [--mode fast]
+        [--latency 0.5] [--failure-rate 0] [--straggler-rate 0]
+        [--tokens-per-second 80]
+        [--output report.json] [--baseline previous.json --tolerance 0.2]
+
+Nothing leaves the machine: actor runs are served by ``FakeActor`` and LLM
+calls by ``StubLLM``. With ``--baseline`` the exit code is 1 when a scenario
+got slower or used more memory than the tolerance allows.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline newsletter pipeline benchmarks")
+    parser.add_argument("--scenario", choices=["single", "batch", "all"], default="all")
+    parser.add_argument("--mode", default="fast", help="Generation mode (agents, fast, parallel, memoized)")
+    parser.add_argument("--batch-size", type=int, default=6, help="Topics in the batch scenario")
+    parser.add_argument("--concurrency", type=int, default=3, help="Topics generated at once")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds per actor run")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction")
+    parser.add_argument("--page-latency", type=float, default=0.01, help="Seconds per dataset page")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability an actor run fails")
+    parser.add_argument("--straggler-rate", type=float, default=0.0, help="Probability an actor run straggles")
+    parser.add_argument("--straggler-factor", type=float, default=10.0, help="Slowdown of straggling runs")
+    parser.add_argument("--items", type=int, default=50, help="Dataset items per actor run")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Stub LLM generation speed")
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Stub LLM seconds before output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scrape-cache", action="store_true", help="Keep the in-memory scrape cache on")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # Configuration is read at import time, so it has to be set before src is imported
+    os.environ["SCRAPE_CACHE_ENABLED"] = "true" if args.scrape_cache else "false"
+    os.environ.setdefault("SCRAPE_CACHE_BACKEND", "memory")
+    os.environ.setdefault("LLM_CACHE_BACKEND", "memory")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+    from benchmarks.harness import compare, run_scenario, scenarios
+
+    platform = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "page_latency": args.page_latency,
+        "failure_rate": args.failure_rate,
+        "straggler_rate": args.straggler_rate,
+        "straggler_factor": args.straggler_factor,
+        "items_per_run": args.items,
+        "seed": args.seed,
+    }
+    llm = {
+        "tokens_per_second": args.tokens_per_second,
+        "first_token_latency": args.first_token_latency,
+    }
+    selected = scenarios(args.batch_size)
+    if args.scenario != "all":
+        selected = {args.scenario: selected[args.scenario]}
+
+    async def run_all():
+        return [
+            await run_scenario(name, topics, args.mode, args.concurrency, platform, llm)
+            for name, topics in selected.items()
+        ]
+
+    report = {"config": vars(args), "results": asyncio.run(run_all())}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
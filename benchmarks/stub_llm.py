@@ -0,0 +1,66 @@
+"""Offline LLM that simulates generation time instead of calling a provider."""
+import math
+import threading
+import time
+from typing import Any, Dict
+
+from crewai import LLM
+
+from src.context_packer import estimate_tokens
+
+
+class StubLLM(LLM):
+    """
+    LLM answering every call with filler text after a simulated delay.
+
+    A call takes ``first_token_latency`` plus the completion length divided by
+    ``tokens_per_second``. The completion is about ``output_ratio`` times the
+    prompt, capped at ``max_output_tokens``, since the writer and editor
+    mostly rewrite what they are given. Answers use the "Final Answer:" form
+    so crewai agents accept them without tool calls.
+    """
+    def __init__(
+        self,
+        tokens_per_second: float = 80.0,
+        first_token_latency: float = 0.3,
+        output_ratio: float = 0.8,
+        max_output_tokens: int = 2048,
+        **kwargs
+    ):
+        super().__init__(model=kwargs.pop("model", "benchmark/stub"), **kwargs)
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.output_ratio = output_ratio
+        self.max_output_tokens = max_output_tokens
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, messages, tools=None, *args, **kwargs):
+        if isinstance(messages, str):
+            prompt = messages
+        else:
+            prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = max(16, min(self.max_output_tokens, math.ceil(prompt_tokens * self.output_ratio)))
+        seconds = self.first_token_latency + completion_tokens / self.tokens_per_second
+        time.sleep(seconds)
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.seconds += seconds
+        body = " ".join(["lorem"] * completion_tokens)
+        return f"Thought: I now know the final answer\nFinal Answer: ## Newsletter\n\n{body}"
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "seconds": round(self.seconds, 3),
+            }
@@ -128,4 +128,42 @@ class EditorAgent:
         final_content.append("*This newsletter is automatically generated using AI technology.*")
         final_content.append("*For more information, please contact us.*")
         
-        return "\n".join(final_content) 
\ No newline at end of file
+        return "\n".join(final_content) 
+
+    @staticmethod
+    def polish(llm, topic: str, content: str, suggestions: List[str] = None) -> str:
+        """
+        Polish a locally assembled draft with a single LLM call.
+        
+        Args:
+            llm: The LLM used by the crew
+            topic: The newsletter topic
+            content: The reviewed draft in markdown
+            suggestions: Review suggestions to address
+            
+        Returns:
+            The polished markdown content, without the newsletter title
+        """
+        notes = "\n".join(f"- {suggestion}" for suggestion in suggestions or [])
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "You are an experienced editor of technology newsletters. You make "
+                    "content accurate, engaging, well-structured and consistent in style."
+                )
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Polish this newsletter draft about: {topic}\n\n"
+                    "Keep every section and every link to the sources. Add a short "
+                    "introduction to each section, tighten the wording and fix formatting. "
+                    "Do not add a newsletter title or footer. Reply with markdown only.\n\n"
+                    + (f"Review notes:\n{notes}\n\n" if notes else "")
+                    + f"Draft:\n{content}"
+                )
+            }
+        ]
+        polished = llm.call(messages)
+        return str(polished).strip() or content
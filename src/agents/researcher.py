@@ -1,7 +1,23 @@
 """Researcher Agent for gathering information about specified topics."""
-from typing import List, Dict
+import asyncio
+import time
+from typing import List, Dict, Optional, Tuple
 from crewai import Agent
 from src.tools import GoogleScraperTool, RedditScraperTool, TwitterScraperTool, YouTubeScraperTool, GoogleNewsScraperTool
+from src.tools.base import ApifyScraperTool, run_sync
+from src.tools.errors import ScrapeError
+from src.tools.records import ResearchItem
+from src.tools.scheduler import RunScheduler
+from src.tools.watermarks import WatermarkStore
+from src.ranking import RelevanceRanker, tokenize
+from src.clustering import StoryClusterer
+from src.planner import QueryPlan
+from src.config.config import (
+    RESEARCH_SOURCE_TIMEOUTS,
+    RESEARCH_DEFAULT_TIMEOUT,
+    RANKING_TOP_K_PER_SECTION,
+    SCRAPE_STREAM_ENOUGH_ITEMS,
+)
 
 class ResearcherAgent:
     @staticmethod
@@ -25,104 +41,371 @@ class ResearcherAgent:
         )
 
     @staticmethod
-    def research_topic(topic: str, actor) -> Dict:
+    def research_sources(
+        topic: str,
+        actor,
+        plan: Optional[QueryPlan] = None
+    ) -> List[Tuple[str, ApifyScraperTool, Dict, bool]]:
+        """
+        Describe the scrapes that make up a research pass.
+        
+        Args:
+            topic: The topic to research
+            actor: Apify Actor instance
+            plan: Optional query plan; without one every source searches for
+                the topic itself
+        
+        Returns:
+            List of (section title, tool, tool arguments, whether the item URLs
+            are added to the research sources) tuples in presentation order.
+        """
+        if plan is not None:
+            return ResearcherAgent._planned_sources(topic, plan, actor)
+        return [
+            # Latest news and articles
+            ("Latest News", GoogleNewsScraperTool(actor=actor), {
+                "keywords": [topic],
+                "maxItems": 10
+            }, True),
+            # General web results
+            ("General Information", GoogleScraperTool(actor=actor), {
+                "queries": [topic],
+                "resultsPerPage": 5,
+                "languageCode": "en",
+                "quickDateRange": "m1"  # Last month
+            }, True),
+            # Community discussions
+            ("Community Discussions", RedditScraperTool(actor=actor), {
+                "searches": [topic],
+                "sort": "relevance",
+                "maxPostCount": 10
+            }, True),
+            # Social media insights
+            ("Social Media Insights", TwitterScraperTool(actor=actor), {
+                "searchTerms": [topic],
+                "sort": "Top"
+            }, False),
+            # Video content
+            ("Video Content", YouTubeScraperTool(actor=actor), {
+                "searchQueries": [topic]
+            }, True),
+        ]
+
+    @staticmethod
+    def _planned_sources(topic: str, plan: QueryPlan, actor) -> List[Tuple[str, ApifyScraperTool, Dict, bool]]:
+        """Scrapes of a query plan, each narrowed to the plan's date window for its source."""
+        now = time.time()
+        # Subreddits are searched for the plan's main Reddit search, or the topic without one
+        subreddit_query = next(iter(plan.reddit_searches), " ".join(topic.split()))
+        reddit_searches = plan.reddit_searches + [
+            f"subreddit:{subreddit} {subreddit_query}" for subreddit in plan.subreddits
+        ]
+        sources = [
+            # The news actor has no date filter, so the window goes into the search operator
+            ("Latest News", GoogleNewsScraperTool(actor=actor), {
+                "keywords": [f"{keyword} when:{plan.window('news')}d" for keyword in plan.news_keywords],
+                "maxItems": 10
+            }, True, None),
+            ("General Information", GoogleScraperTool(actor=actor), {
+                "queries": plan.google_queries,
+                "resultsPerPage": 5,
+                "languageCode": "en"
+            }, True, "google"),
+            ("Community Discussions", RedditScraperTool(actor=actor), {
+                "searches": reddit_searches,
+                "sort": "relevance",
+                "maxPostCount": 10
+            }, True, "reddit"),
+            ("Social Media Insights", TwitterScraperTool(actor=actor), {
+                "searchTerms": plan.twitter_terms,
+                "sort": "Top"
+            }, False, "twitter"),
+            ("Video Content", YouTubeScraperTool(actor=actor), {
+                "searchQueries": plan.youtube_queries
+            }, True, "youtube"),
+        ]
+        return [
+            (
+                section,
+                tool,
+                tool.narrow_since(kwargs, now - plan.window(window) * 86400) if window else kwargs,
+                track_sources
+            )
+            for section, tool, kwargs, track_sources, window in sources
+        ]
+
+    @staticmethod
+    def research_topic(
+        topic: str,
+        actor,
+        concurrent: bool = False,
+        watermarks: Optional[WatermarkStore] = None,
+        plan: Optional[QueryPlan] = None
+    ) -> Dict:
         """
         Research a specific topic and return structured information.
         
         Args:
             topic: The topic to research
             actor: Apify Actor instance
+            concurrent: Scrape all sources at once instead of one after another
+            watermarks: Optional store of per-source watermarks; when given,
+                each source only scrapes items newer than its previous run
+                and merges them with the stored backlog
+            plan: Optional query plan compiled by ``QueryPlanner``; the
+                sources search for its terms instead of the topic
             
         Returns:
             Dict containing research results with keys:
             - summary: Brief overview
             - key_points: List of main points
             - sources: List of reference URLs
+            - sections: ResearchItem lists keyed by section title
+        """
+        if concurrent:
+            return run_sync(ResearcherAgent.research_topic_async(topic, actor, watermarks=watermarks, plan=plan))
+
+        results = ResearcherAgent._empty_results()
+        
+        try:
+            for section, tool, kwargs, track_sources in ResearcherAgent.research_sources(topic, actor, plan):
+                try:
+                    items = run_sync(ResearcherAgent._fetch_source(topic, section, tool, kwargs, watermarks))
+                except ScrapeError as e:
+                    print(f"Error researching '{section}': {str(e)}")
+                    continue
+                ResearcherAgent._add_section(results, section, items, track_sources)
+            ResearcherAgent._summarize(results, topic)
+        except Exception as e:
+            print(f"Error during research: {str(e)}")
+            
+        return results
+
+    @staticmethod
+    async def research_topic_async(
+        topic: str,
+        actor,
+        timeouts: Optional[Dict[str, float]] = None,
+        watermarks: Optional[WatermarkStore] = None,
+        plan: Optional[QueryPlan] = None
+    ) -> Dict:
+        """
+        Research a topic by scraping every source concurrently.
+        
+        Each source runs under its own timeout and is collected as soon as it
+        completes, so the pass takes roughly as long as the slowest source.
+        Sources that fail or time out are left out of the results.
+        
+        Args:
+            topic: The topic to research
+            actor: Apify Actor instance
+            timeouts: Optional per-section timeouts in seconds, overriding
+                RESEARCH_SOURCE_TIMEOUTS
+            watermarks: Optional store of per-source watermarks, as in
+                ``research_topic``
+            plan: Optional query plan, as in ``research_topic``
+            
+        Returns:
+            Dict with the same shape as ``research_topic``
+        """
+        timeouts = {**RESEARCH_SOURCE_TIMEOUTS, **(timeouts or {})}
+        sources = ResearcherAgent.research_sources(topic, actor, plan)
+
+        collected = {}
+        async with RunScheduler() as scheduler:
+            for section, tool, kwargs, _ in sources:
+                scheduler.submit(
+                    section,
+                    ResearcherAgent._fetch_source(topic, section, tool, kwargs, watermarks),
+                    timeout=timeouts.get(section, RESEARCH_DEFAULT_TIMEOUT)
+                )
+            async for result in scheduler.as_completed():
+                if result.error is None:
+                    collected[result.key] = result.value
+                elif result.timed_out:
+                    print(f"Research source '{result.key}' timed out")
+                else:
+                    print(f"Error researching '{result.key}': {str(result.error)}")
+
+        return ResearcherAgent.assemble_results(topic, sources, collected)
+
+    @staticmethod
+    def assemble_results(
+        topic: str,
+        sources: List[Tuple[str, ApifyScraperTool, Dict, bool]],
+        collected: Dict[str, Optional[List[ResearchItem]]]
+    ) -> Dict:
+        """
+        Build research results from the items scraped per source.
+        
+        Args:
+            topic: The researched topic
+            sources: The scrapes of the research pass, from ``research_sources``
+            collected: Items keyed by section title; sources that failed are
+                missing or None
+            
+        Returns:
+            Dict with the same shape as ``research_topic``
+        """
+        results = ResearcherAgent._empty_results()
+        # Assemble in source order so the result does not depend on timing
+        for section, _, _, track_sources in sources:
+            if collected.get(section) is not None:
+                ResearcherAgent._add_section(results, section, collected[section], track_sources)
+        ResearcherAgent._summarize(results, topic)
+        return results
+
+    @staticmethod
+    def scrape_source(
+        topic: str,
+        section: str,
+        tool: ApifyScraperTool,
+        kwargs: Dict,
+        watermarks: Optional[WatermarkStore] = None
+    ) -> Optional[List[ResearchItem]]:
+        """
+        Scrape a single source under its timeout, blocking until it is done.
+        
+        Returns:
+            The source's items, or None when it failed or timed out
+        """
+        timeout = RESEARCH_SOURCE_TIMEOUTS.get(section, RESEARCH_DEFAULT_TIMEOUT)
+        try:
+            return run_sync(asyncio.wait_for(
+                ResearcherAgent._fetch_source(topic, section, tool, kwargs, watermarks), timeout
+            ))
+        except asyncio.TimeoutError:
+            print(f"Research source '{section}' timed out")
+        except ScrapeError as e:
+            print(f"Error researching '{section}': {str(e)}")
+        return None
+
+    @staticmethod
+    async def _fetch_source(
+        topic: str,
+        section: str,
+        tool: ApifyScraperTool,
+        kwargs: Dict,
+        watermarks: Optional[WatermarkStore] = None
+    ):
+        """
+        Fetch one source, incrementally when a watermark store is given.
+        
+        The tool arguments are narrowed to items newer than the source's
+        watermark, and the new items are merged with the backlog of earlier
+        runs before the watermark is advanced and saved. A scrape that did
+        not read its whole run only advances it to its oldest item.
         """
-        results = {
+        if watermarks is None:
+            items, _ = await ResearcherAgent._scrape(topic, tool, kwargs)
+            return items
+        
+        watermark = await watermarks.load(topic, section)
+        if watermark.since is not None:
+            kwargs = tool.narrow_since(kwargs, watermark.since)
+        items, complete = await ResearcherAgent._scrape(topic, tool, kwargs)
+        
+        merged = watermark.merge(items, complete=complete)
+        try:
+            await watermarks.save(topic, section, watermark)
+        except Exception as e:
+            print(f"Could not save watermark for '{section}': {str(e)}")
+        return merged
+
+    @staticmethod
+    async def _scrape(topic: str, tool: ApifyScraperTool, kwargs: Dict) -> Tuple[List[ResearchItem], bool]:
+        """
+        Scrape one source, stopping early once it has produced enough.
+        
+        Sources that share runs through query batching are fetched as a
+        whole. The others are streamed while their run is going, and the run
+        is aborted once SCRAPE_STREAM_ENOUGH_ITEMS items mention the topic.
+        
+        Returns:
+            (records, whether they are everything the run produced; False
+            when the scrape stopped early or the time budget cut it short)
+        """
+        if tool.batch_query_field or SCRAPE_STREAM_ENOUGH_ITEMS <= 0:
+            return await tool.scrape(**kwargs)
+        
+        terms = set(tokenize(topic))
+        items = []
+        relevant = 0
+        complete = False
+        
+        def finished(read_all: bool) -> None:
+            nonlocal complete
+            complete = read_all
+        
+        stream = tool.stream(on_complete=finished, **kwargs)
+        try:
+            async for item in stream:
+                items.append(item)
+                relevant += bool(terms.intersection(tokenize(f"{item.title} {item.snippet}")))
+                if relevant >= SCRAPE_STREAM_ENOUGH_ITEMS:
+                    break
+        finally:
+            await stream.aclose()
+        return items, complete
+
+    @staticmethod
+    def _empty_results() -> Dict:
+        return {
             "summary": "",
             "key_points": [],
             "sources": [],
             "sections": {}
         }
+
+    @staticmethod
+    def _add_section(results: Dict, section: str, items, track_sources: bool) -> None:
+        """Store a source's items under its section, skipping failed scrapes."""
+        if not isinstance(items, list):
+            return
+        results["sections"][section] = items
+        if track_sources:
+            results["sources"].extend([item.url for item in items])
+
+    @staticmethod
+    def _summarize(results: Dict, topic: str) -> None:
+        """
+        Collapse near-duplicate stories, rank the items, then fill in summary,
+        key points and de-duplicated sources.
+        """
+        ranker = RelevanceRanker()
+        ResearcherAgent._collapse_stories(results, topic, ranker)
+        results["sections"] = ranker.rank_sections(topic, results["sections"], RANKING_TOP_K_PER_SECTION)
         
-        # Initialize tools
-        google_tool = GoogleScraperTool(actor=actor)
-        reddit_tool = RedditScraperTool(actor=actor)
-        twitter_tool = TwitterScraperTool(actor=actor)
-        youtube_tool = YouTubeScraperTool(actor=actor)
-        news_tool = GoogleNewsScraperTool(actor=actor)
-        
-        # Search parameters
-        search_params = {
-            "queries": [topic],
-            "resultsPerPage": 5,
-            "maxPagesPerQuery": 2,
-            "languageCode": "en",
-            "quickDateRange": "m1"  # Last month
-        }
+        # Extract key points from all sources, most relevant first
+        all_items = [item for section_results in results["sections"].values() for item in section_results]
+        all_content = []
+        for item in ranker.rank(topic, all_items):
+            content = f"{item.title} {item.snippet}".strip()
+            if content:
+                all_content.append(content)
         
-        try:
-            # Get latest news and articles
-            news_results = news_tool._run(**search_params)
-            if isinstance(news_results, list):
-                results["sections"]["Latest News"] = news_results
-                results["sources"].extend([item.get("url") for item in news_results if item.get("url")])
-            
-            # Get general web results
-            web_results = google_tool._run(**search_params)
-            if isinstance(web_results, list):
-                results["sections"]["General Information"] = web_results
-                results["sources"].extend([item.get("url") for item in web_results if item.get("url")])
-            
-            # Get community discussions
-            reddit_results = reddit_tool._run(
-                subreddits=["artificial", "MachineLearning", "AINews"],
-                searchType="relevance",
-                searchQuery=topic,
-                maxItems=10
-            )
-            if isinstance(reddit_results, list):
-                results["sections"]["Community Discussions"] = reddit_results
-                results["sources"].extend([item.get("url") for item in reddit_results if item.get("url")])
-            
-            # Get social media insights
-            twitter_results = twitter_tool._run(
-                searchTerms=[topic],
-                maxItems=10,
-                sortBy="relevance"
-            )
-            if isinstance(twitter_results, list):
-                results["sections"]["Social Media Insights"] = twitter_results
-            
-            # Get video content
-            youtube_results = youtube_tool._run(
-                searchTerms=[topic],
-                maxItems=5,
-                sortBy="relevance"
-            )
-            if isinstance(youtube_results, list):
-                results["sections"]["Video Content"] = youtube_results
-                results["sources"].extend([item.get("url") for item in youtube_results if item.get("url")])
-            
-            # Extract key points from all sources
-            all_content = []
-            for section_results in results["sections"].values():
-                if isinstance(section_results, list):
-                    for item in section_results:
-                        if isinstance(item, dict):
-                            content = item.get("title", "") + " " + item.get("description", "")
-                            if content.strip():
-                                all_content.append(content)
-            
-            # Create summary and key points
-            results["summary"] = "\n".join(all_content[:3])  # First 3 items for summary
-            results["key_points"] = [content for content in all_content[3:10]]  # Next 7 items for key points
-            
-            # Remove duplicates from sources
-            results["sources"] = list(set(results["sources"]))
-            
-        except Exception as e:
-            print(f"Error during research: {str(e)}")
-            
-        return results 
\ No newline at end of file
+        # Create summary and key points
+        results["summary"] = "\n".join(all_content[:3])  # Top 3 items for summary
+        results["key_points"] = [content for content in all_content[3:10]]  # Next 7 items for key points
+        
+        # Remove duplicates from sources
+        results["sources"] = list(dict.fromkeys(results["sources"]))
+
+    @staticmethod
+    def _collapse_stories(results: Dict, topic: str, ranker: RelevanceRanker) -> None:
+        """
+        Keep one item per story across all sections.
+        
+        Items are clustered in ranked order, so the best-ranked item of each
+        story stays in its section and carries the URLs of the others as
+        alternates; the others are dropped.
+        """
+        all_items = [item for section_results in results["sections"].values() for item in section_results]
+        if len(all_items) < 2:
+            return
+        representatives = StoryClusterer().representatives(ranker.rank(topic, all_items))
+        kept = {id(item) for item in representatives}
+        results["sections"] = {
+            section: [item for item in section_results if id(item) in kept]
+            for section, section_results in results["sections"].items()
+        }
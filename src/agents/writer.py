@@ -1,6 +1,8 @@
 """Writer Agent for creating engaging newsletter content."""
 from typing import Dict, List
+from urllib.parse import urlsplit
 from crewai import Agent
+from src.tools.records import ResearchItem
 # import markdown
 import re
 
@@ -33,7 +35,8 @@ class WriterAgent:
         
         Args:
             section_title: Title of the section
-            research_data: Dictionary containing research information
+            research_data: Dictionary containing research information, with
+                ResearchItem lists under "sections"
             style_guide: Optional style guidelines
             
         Returns:
@@ -60,6 +63,44 @@ class WriterAgent:
         
         return "\n".join(content)
 
+    @staticmethod
+    def write_section(llm, topic: str, section_title: str, research_context: str) -> str:
+        """
+        Write one newsletter section from its research with a single LLM call.
+        
+        Args:
+            llm: The LLM used by the crew
+            topic: The newsletter topic
+            section_title: Title of the section
+            research_context: Packed research for this section only
+            
+        Returns:
+            The section in markdown, starting with its "## " header
+        """
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "You are a skilled content writer specializing in technology and AI topics. "
+                    "You turn research into clear, engaging content and include all the links "
+                    "to the sources."
+                )
+            },
+            {
+                "role": "user",
+                "content": (
+                    f'Write the "{section_title}" section of a newsletter about {topic}.\n\n'
+                    f'Start with the header "## {section_title}", base the content only on the '
+                    "research below and link to the sources. Reply with markdown only.\n\n"
+                    f"Research for this section:\n{research_context}"
+                )
+            }
+        ]
+        section = str(llm.call(messages)).strip()
+        if not section.startswith("## "):
+            section = f"## {section_title}\n\n{section}"
+        return section
+
     @staticmethod
     def format_markdown(content: str) -> str:
         """
@@ -86,93 +127,88 @@ class WriterAgent:
         return content.strip()
 
     @staticmethod
-    def _format_news_section(news_items: List[Dict]) -> List[str]:
+    def _format_news_section(news_items: List[ResearchItem]) -> List[str]:
         """Format news items into markdown content."""
         content = []
         for item in news_items:
-            title = item.get("title", "").strip()
-            description = item.get("description", "").strip()
-            url = item.get("url", "").strip()
-            date = item.get("date", "").strip()
-            
-            if title and url:
-                content.append(f"### [{title}]({url})")
-                if date:
-                    content.append(f"*Published: {date}*")
-                if description:
-                    content.append(f"\n{description}\n")
+            if item.title and item.url:
+                content.append(f"### [{item.title}]({item.url})")
+                if item.date:
+                    content.append(f"*Published: {item.date}*")
+                if item.snippet:
+                    content.append(f"\n{item.snippet}\n")
+                content.extend(WriterAgent._format_alternates(item))
         return content
 
     @staticmethod
-    def _format_community_section(community_items: List[Dict]) -> List[str]:
+    def _format_community_section(community_items: List[ResearchItem]) -> List[str]:
         """Format community discussions into markdown content."""
         content = []
         for item in community_items:
-            title = item.get("title", "").strip()
-            text = item.get("text", "").strip()
-            url = item.get("url", "").strip()
-            author = item.get("author", "").strip()
-            
-            if title and url:
-                content.append(f"### [{title}]({url})")
-                if author:
-                    content.append(f"*Posted by {author}*")
+            if item.title and item.url:
+                content.append(f"### [{item.title}]({item.url})")
+                if item.author:
+                    content.append(f"*Posted by {item.author}*")
+                text = item.snippet
                 if text:
                     # Truncate long text
                     if len(text) > 300:
                         text = text[:297] + "..."
                     content.append(f"\n{text}\n")
+                content.extend(WriterAgent._format_alternates(item))
         return content
 
     @staticmethod
-    def _format_social_section(social_items: List[Dict]) -> List[str]:
+    def _format_social_section(social_items: List[ResearchItem]) -> List[str]:
         """Format social media content into markdown content."""
         content = []
         for item in social_items:
-            text = item.get("text", "").strip()
-            url = item.get("url", "").strip()
-            author = item.get("author", "").strip()
-            
-            if text:
-                content.append(f"> {text}")
-                if author:
-                    content.append(f"*— {author}*")
-                if url:
-                    content.append(f"[View on Twitter]({url})\n")
+            if item.snippet:
+                content.append(f"> {item.snippet}")
+                if item.author:
+                    content.append(f"*— {item.author}*")
+                if item.url:
+                    content.append(f"[View on Twitter]({item.url})\n")
+                content.extend(WriterAgent._format_alternates(item))
         return content
 
     @staticmethod
-    def _format_video_section(video_items: List[Dict]) -> List[str]:
+    def _format_video_section(video_items: List[ResearchItem]) -> List[str]:
         """Format video content into markdown content."""
         content = []
         for item in video_items:
-            title = item.get("title", "").strip()
-            description = item.get("description", "").strip()
-            url = item.get("url", "").strip()
-            channel = item.get("channel", "").strip()
-            
-            if title and url:
-                content.append(f"### [{title}]({url})")
-                if channel:
-                    content.append(f"*By {channel}*")
+            if item.title and item.url:
+                content.append(f"### [{item.title}]({item.url})")
+                if item.author:
+                    content.append(f"*By {item.author}*")
+                description = item.snippet
                 if description:
                     # Truncate long descriptions
                     if len(description) > 200:
                         description = description[:197] + "..."
                     content.append(f"\n{description}\n")
+                content.extend(WriterAgent._format_alternates(item))
         return content
 
     @staticmethod
-    def _format_general_section(items: List[Dict]) -> List[str]:
+    def _format_general_section(items: List[ResearchItem]) -> List[str]:
         """Format general content into markdown content."""
         content = []
         for item in items:
-            title = item.get("title", "").strip()
-            description = item.get("description", "").strip()
-            url = item.get("url", "").strip()
-            
-            if title and url:
-                content.append(f"### [{title}]({url})")
-                if description:
-                    content.append(f"\n{description}\n")
-        return content 
\ No newline at end of file
+            if item.title and item.url:
+                content.append(f"### [{item.title}]({item.url})")
+                if item.snippet:
+                    content.append(f"\n{item.snippet}\n")
+                content.extend(WriterAgent._format_alternates(item))
+        return content
+
+    @staticmethod
+    def _format_alternates(item: ResearchItem) -> List[str]:
+        """Link the other sources that covered the same story."""
+        if not item.alternates:
+            return []
+        links = []
+        for url in item.alternates:
+            host = urlsplit(url).netloc or url
+            links.append(f"[{host}]({url})")
+        return [f"*Also covered by: {', '.join(links)}*\n"]
@@ -0,0 +1,81 @@
+"""End-to-end time budget of a newsletter run, split across its stages."""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from src.config.config import TIME_BUDGET_SHARES
+
+
+class TimeBudget:
+    """
+    A deadline for a whole run and the share of it each stage may use.
+
+    Stages are given, in pipeline order, a share of the time that is left when
+    they start, relative to the shares of the stages still to come. Time a
+    stage does not use therefore goes to the later ones.
+
+    Args:
+        total_secs: Seconds from now until the deadline
+        shares: Relative share of each stage, in pipeline order
+    """
+    def __init__(self, total_secs: float, shares: Optional[Dict[str, float]] = None):
+        self.total_secs = total_secs
+        self.shares = dict(shares or TIME_BUDGET_SHARES)
+        self.deadline = time.monotonic() + total_secs
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stage_deadline(self, *stages: str) -> float:
+        """The deadline of the given stages (run as one) if they started now."""
+        order = list(self.shares)
+        first = min(order.index(name) for name in stages)
+        later = sum(self.shares[name] for name in order[first:])
+        share = sum(self.shares[name] for name in stages)
+        fraction = share / later if later > 0 else 1.0
+        return min(self.deadline, time.monotonic() + self.remaining() * fraction)
+
+
+_budget: contextvars.ContextVar[Optional[TimeBudget]] = contextvars.ContextVar("time_budget", default=None)
+_stage_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("time_budget_stage", default=None)
+
+
+@contextmanager
+def budgeting(budget: Optional[TimeBudget]) -> Iterator[Optional[TimeBudget]]:
+    """
+    Bound the current context by ``budget``; ``None`` leaves it unbounded.
+
+    Like the metrics recorder, the budget follows the context into worker
+    threads and coroutines scheduled with ``run_sync``.
+    """
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+@contextmanager
+def stage_budget(*stages: str) -> Iterator[None]:
+    """Limit the enclosed block to the share of the budget of ``stages``."""
+    budget = _budget.get()
+    if budget is None:
+        yield
+        return
+    token = _stage_deadline.set(budget.stage_deadline(*stages))
+    try:
+        yield
+    finally:
+        _stage_deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left for the current stage (or run), or None without a budget."""
+    budget = _budget.get()
+    if budget is None:
+        return None
+    deadline = _stage_deadline.get()
+    if deadline is None:
+        return budget.remaining()
+    return max(0.0, deadline - time.monotonic())
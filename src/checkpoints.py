@@ -0,0 +1,56 @@
+"""Checkpoints of finished newsletter stages, for resuming failed or migrated runs."""
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from src.config.config import CHECKPOINT_KEY_PREFIX
+from src.tools.cache import cache_key
+from src.tools.records import ResearchItem
+
+
+class StageCheckpoints:
+    """
+    Outputs of the finished stages of one newsletter, kept in the default key-value store.
+
+    The default store belongs to the run, so a run that is restarted,
+    resurrected or migrated finds the checkpoints of its earlier attempt and
+    resumes after the last finished stage instead of scraping and prompting
+    again. The record is keyed by topic and mode.
+    """
+    def __init__(self, actor, topic: str, mode: str):
+        self.actor = actor
+        self.key = f"{CHECKPOINT_KEY_PREFIX}-{cache_key(' '.join(topic.split()), mode)[:32]}"
+        self.topic = topic
+        self.mode = mode
+        self.stages: Dict[str, Any] = {}
+
+    async def load(self) -> "StageCheckpoints":
+        saved = await self.actor.get_value(self.key) or {}
+        self.stages = dict(saved.get("stages") or {})
+        return self
+
+    def get(self, stage: str) -> Optional[Any]:
+        return self.stages.get(stage)
+
+    async def save(self, stage: str, output: Any) -> None:
+        """Record a finished stage; the whole record is written so it never holds half a stage."""
+        self.stages[stage] = output
+        await self.actor.set_value(self.key, {"topic": self.topic, "mode": self.mode, "stages": self.stages})
+
+    async def clear(self) -> None:
+        """Drop the checkpoints once the newsletter is delivered."""
+        self.stages = {}
+        await self.actor.set_value(self.key, None)
+
+
+def research_to_dict(research: Dict) -> Dict:
+    """JSON-serializable form of ``ResearcherAgent`` results."""
+    return dict(research, sections={
+        section: [asdict(item) for item in items] for section, items in research["sections"].items()
+    })
+
+
+def research_from_dict(data: Dict) -> Dict:
+    """Researcher results restored from ``research_to_dict``."""
+    return dict(data, sections={
+        section: [ResearchItem(**item) for item in items] for section, items in data["sections"].items()
+    })
@@ -0,0 +1,121 @@
+"""Near-duplicate story clustering across sources with MinHash and LSH."""
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.config.config import (
+    CLUSTER_BANDS,
+    CLUSTER_NUM_PERM,
+    CLUSTER_SHINGLE_SIZE,
+    CLUSTER_THRESHOLD,
+)
+from src.ranking import tokenize
+from src.tools.records import ResearchItem
+
+# Prime just below 2**32, so (a * x + b) never overflows uint64
+_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint64(4294967295)
+
+
+def shingles(text: str, size: int = CLUSTER_SHINGLE_SIZE) -> np.ndarray:
+    """Hashes of the word n-grams of a text."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return np.array(sorted({zlib.crc32(gram.encode("utf-8")) for gram in grams}), dtype=np.uint64)
+
+
+class StoryClusterer:
+    """
+    Groups near-duplicate items into stories.
+
+    Each item's title and snippet are shingled and reduced to a MinHash
+    signature. Signatures are split into ``bands`` bands that are hashed into
+    buckets, so only items sharing a bucket are compared; candidate pairs are
+    merged when their estimated Jaccard similarity reaches ``threshold``.
+    """
+    def __init__(
+        self,
+        num_perm: int = CLUSTER_NUM_PERM,
+        bands: int = CLUSTER_BANDS,
+        threshold: float = CLUSTER_THRESHOLD,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signatures(self, items: Sequence[ResearchItem]) -> np.ndarray:
+        """MinHash signature matrix with one row per item."""
+        signatures = np.full((len(items), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        for row, item in enumerate(items):
+            hashes = shingles(f"{item.title} {item.snippet}")
+            if hashes.size:
+                permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+                signatures[row] = permuted.min(axis=1)
+        return signatures
+
+    def clusters(self, items: Sequence[ResearchItem]) -> List[List[int]]:
+        """
+        Cluster items by similarity.
+
+        Returns:
+            Lists of item indices, one per story, each in input order; the
+            stories are ordered by their first item
+        """
+        parent = list(range(len(items)))
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        signatures = self.signatures(items)
+        empty = (signatures == _MAX_HASH).all(axis=1)
+        for band in range(self.bands):
+            buckets: Dict[bytes, List[int]] = defaultdict(list)
+            band_rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            for index in range(len(items)):
+                if not empty[index]:
+                    buckets[band_rows[index].tobytes()].append(index)
+            for members in buckets.values():
+                first = members[0]
+                for other in members[1:]:
+                    if find(first) == find(other):
+                        continue
+                    similarity = np.mean(signatures[first] == signatures[other])
+                    if similarity >= self.threshold:
+                        parent[max(find(first), find(other))] = min(find(first), find(other))
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for index in range(len(items)):
+            groups[find(index)].append(index)
+        return sorted(groups.values(), key=lambda group: group[0])
+
+    def representatives(self, items: Sequence[ResearchItem]) -> List[ResearchItem]:
+        """
+        Collapse every story to its first item.
+
+        The URLs of the other items of a story are added to the
+        representative's ``alternates``, so pass items best first.
+        """
+        representatives = []
+        for group in self.clusters(items):
+            representative = items[group[0]]
+            for index in group[1:]:
+                url = items[index].url
+                if url != representative.url and url not in representative.alternates:
+                    representative.alternates.append(url)
+            representatives.append(representative)
+        return representatives
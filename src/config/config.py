@@ -19,6 +19,198 @@ DEFAULT_NEWSLETTER_SECTIONS = [
     "Video Content",
 ]
 
+# Research Configuration
+# Per-source timeouts (seconds) for concurrent research, keyed by section title
+RESEARCH_SOURCE_TIMEOUTS = {
+    "Latest News": 120,
+    "General Information": 120,
+    "Community Discussions": 240,
+    "Social Media Insights": 180,
+    "Video Content": 240,
+}
+RESEARCH_DEFAULT_TIMEOUT = 300
+
+# Scrape Cache Configuration
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "true").lower() == "true"
+# Persistent tier: "kvs" (named Actor key-value store), "dir" (local directory) or "memory"
+SCRAPE_CACHE_BACKEND = os.getenv("SCRAPE_CACHE_BACKEND", "kvs")
+SCRAPE_CACHE_STORE = "newsletter-scrape-cache"
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "storage/scrape_cache")
+SCRAPE_CACHE_MAX_ENTRIES = 256
+SCRAPE_CACHE_DEFAULT_TTL = 60 * 60
+# Per-actor time-to-live (seconds); fast-moving sources expire sooner
+SCRAPE_CACHE_TTLS = {
+    "aymorato/super-fast-google-news-scraper-pay-per-result": 15 * 60,
+    "apify/google-search-scraper": 6 * 60 * 60,
+    "trudax/reddit-scraper-lite": 60 * 60,
+    "apidojo/twitter-scraper-lite": 30 * 60,
+    "streamers/youtube-scraper": 24 * 60 * 60,
+}
+
+# Query Batching Configuration
+# Google and Google News searches with otherwise identical inputs that arrive
+# within this window share one actor run; 0 disables batching
+QUERY_BATCH_WINDOW_SECS = float(os.getenv("QUERY_BATCH_WINDOW_SECS", "0.25"))
+# A shared run starts early once this many distinct queries are waiting
+QUERY_BATCH_MAX_QUERIES = 10
+
+# Scrape Resilience Configuration
+# Failed runs are retried up to MAX_RETRIES times; retry n first waits a random
+# time of up to SCRAPE_RETRY_BACKOFF_BASE_SECS * 2**n seconds, capped
+SCRAPE_RETRY_BACKOFF_BASE_SECS = 1.0
+SCRAPE_RETRY_BACKOFF_MAX_SECS = 30.0
+# A run still going after its actor's p95 latency gets a duplicate (hedge) run;
+# whichever finishes first is used and the other one is aborted. The p95 is
+# taken over the last SCRAPE_HEDGE_WINDOW successful runs, and
+# "hedge_after_secs" is used until SCRAPE_HEDGE_MIN_SAMPLES runs were seen
+SCRAPE_HEDGE_ENABLED = os.getenv("SCRAPE_HEDGE_ENABLED", "true").lower() == "true"
+SCRAPE_HEDGE_WINDOW = 100
+SCRAPE_HEDGE_MIN_SAMPLES = 10
+SCRAPE_HEDGE_DEFAULT_AFTER_SECS = 60
+# Per-actor overrides of the policy: "retries", "hedge" and "hedge_after_secs"
+SCRAPE_RESILIENCE = {
+    # Billed per result, so a hedge would double the cost of slow runs
+    "aymorato/super-fast-google-news-scraper-pay-per-result": {"hedge": False},
+    "apify/google-search-scraper": {"hedge_after_secs": 45},
+    "trudax/reddit-scraper-lite": {"hedge_after_secs": 90},
+    "apidojo/twitter-scraper-lite": {"hedge_after_secs": 60},
+    "streamers/youtube-scraper": {"hedge_after_secs": 90},
+}
+
+# Incremental Scraping Configuration (enabled with the "incremental" input)
+# Persistent store: "kvs" (named Actor key-value store) or "dir" (local directory)
+WATERMARK_BACKEND = os.getenv("WATERMARK_BACKEND", "kvs")
+WATERMARK_STORE = "newsletter-watermarks"
+WATERMARK_DIR = os.getenv("WATERMARK_DIR", "storage/watermarks")
+# Re-scrape this far behind the watermark to catch late-indexed items
+WATERMARK_OVERLAP_SECS = 24 * 60 * 60
+# Earlier items are merged back in while younger than this
+WATERMARK_BACKLOG_DAYS = 30
+WATERMARK_MAX_IDS = 2000
+
+# Dataset Retrieval Configuration
+DATASET_PAGE_SIZE = 100
+# Caps on what a single tool call reads from a run's dataset
+DATASET_MAX_ITEMS = 200
+DATASET_MAX_BYTES = 2 * 1024 * 1024
+
+# Streaming Configuration
+# Sources that do not share runs through query batching read their dataset
+# while the run is going, and stop (aborting the run, which also ends
+# pay-per-result charges) once this many items mention the topic; 0 disables
+SCRAPE_STREAM_ENOUGH_ITEMS = int(os.getenv("SCRAPE_STREAM_ENOUGH_ITEMS", "24"))
+# Seconds between polls of a running run's dataset: the first poll after the
+# items read so far waits the minimum, and each empty poll doubles the wait
+# up to the maximum
+SCRAPE_STREAM_POLL_MIN_SECS = 0.25
+SCRAPE_STREAM_POLL_MAX_SECS = 2.0
+
+# Relevance Ranking Configuration
+# Items kept per section after ranking research against the topic
+RANKING_TOP_K_PER_SECTION = 8
+RANKING_WEIGHTS = {"relevance": 0.6, "recency": 0.25, "engagement": 0.15}
+RANKING_BM25_K1 = 1.5
+RANKING_BM25_B = 0.75
+RANKING_RECENCY_HALF_LIFE_DAYS = 7
+# Recency score for items without a publication date
+RANKING_MISSING_RECENCY = 0.3
+
+# Story Clustering Configuration
+# Near-duplicate items across sources are collapsed into one story
+CLUSTER_SHINGLE_SIZE = 2  # Words per shingle of title and snippet
+CLUSTER_NUM_PERM = 64  # MinHash permutations
+CLUSTER_BANDS = 16  # LSH bands of CLUSTER_NUM_PERM / CLUSTER_BANDS rows each
+# Estimated Jaccard similarity at which two items are the same story
+CLUSTER_THRESHOLD = 0.5
+
+# Query Planning Configuration (enabled with the "planQueries" input)
+# Search terms the plan may use per source
+PLANNER_MAX_QUERIES = 3
+# Days searched back for sources the plan gives no window for
+PLANNER_DEFAULT_WINDOW_DAYS = 30
+PLANNER_MAX_WINDOW_DAYS = 365
+
+# Research sections each newsletter section draws on when sections are
+# written independently (see the "parallel" generation mode)
+SECTION_RESEARCH_SOURCES = {
+    "Latest News": ["Latest News"],
+    "Industry Updates": ["Latest News", "General Information"],
+    "Tools & Frameworks": ["General Information", "Community Discussions"],
+    "Companies & Startups": ["Latest News", "General Information"],
+    "Research & Development": ["General Information", "Video Content"],
+    "Community Discussions": ["Community Discussions", "Social Media Insights"],
+    "Video Content": ["Video Content"],
+}
+
+# Context Packing Configuration
+# Tokens of research each newsletter section may contribute to writer/editor prompts
+CONTEXT_SECTION_TOKEN_BUDGET = 1200
+# Items are only truncated when at least this many tokens of budget remain
+CONTEXT_MIN_TRUNCATED_TOKENS = 40
+CONTEXT_CHARS_PER_TOKEN = 4
+
+# LLM Completion Cache Configuration (enabled with the "llmCache" input)
+# Persistent tier, with the same choices as SCRAPE_CACHE_BACKEND
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "kvs")
+LLM_CACHE_STORE = "newsletter-llm-cache"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "storage/llm_cache")
+LLM_CACHE_MAX_ENTRIES = 512
+# Completions kept in the persistent tier; the least recently written are evicted
+LLM_CACHE_MAX_STORED_ENTRIES = 5000
+
+# Generation Modes
+# "agents": tool-calling research crew, writer and editor agents
+# "fast": deterministic research and formatting with one LLM polish call
+# "parallel": deterministic research, one concurrent writer call per section
+#             and an editor call that stitches the sections together
+# "memoized": the "parallel" pipeline as a graph of stages whose outputs are
+#             reused across runs while their inputs are unchanged
+GENERATION_MODES = ("agents", "fast", "parallel", "memoized")
+
+# Stage Memo Configuration (used by the "memoized" generation mode)
+# Writer and editor stages are keyed by a content hash of their inputs, so a
+# regenerated newsletter only calls the LLM for sections whose research changed.
+# Persistent tier, with the same choices as SCRAPE_CACHE_BACKEND
+STAGE_MEMO_BACKEND = os.getenv("STAGE_MEMO_BACKEND", "kvs")
+STAGE_MEMO_STORE = "newsletter-stage-memo"
+STAGE_MEMO_DIR = os.getenv("STAGE_MEMO_DIR", "storage/stage_memo")
+STAGE_MEMO_MAX_ENTRIES = 256
+# Stage outputs kept in the persistent tier; the least recently written are evicted
+STAGE_MEMO_MAX_STORED_ENTRIES = 2000
+
+# Time Budget Configuration (enabled with the "timeBudgetSecs" input)
+# Relative share of the remaining budget each stage may use, in pipeline
+# order; time a stage leaves unused goes to the stages after it
+TIME_BUDGET_SHARES = {"research": 0.5, "write": 0.3, "edit": 0.2}
+# Scrapes run with the stage's remaining time as their Apify timeout and are
+# aborted when still going this long after it; their partial dataset is used
+TIME_BUDGET_GRACE_SECS = 10
+# LLM writing and polishing are skipped, in favour of the locally formatted
+# draft, when their stage has less time than this left
+TIME_BUDGET_MIN_LLM_SECS = 20
+
+# Batch Configuration
+# Newsletters generated at the same time when the input lists several topics
+BATCH_MAX_CONCURRENCY = 3
+
+# Metrics Configuration
+# Default key-value store records holding the run-wide span summary
+METRICS_JSON_KEY = "METRICS"
+METRICS_PROMETHEUS_KEY = "METRICS_PROMETHEUS"
+
+# Run State Configuration
+# Default key-value store record listing the topics a run already finished,
+# so a migrated or restarted run does not generate them again
+RUN_STATE_KEY = "RUN_STATE"
+# Seconds a migrating run with unfinished topics waits for the platform to
+# move it to another host before it fails, so the topics are not lost
+RUN_MIGRATION_WAIT_SECS = 120
+# Prefix of the default key-value store records holding each topic's finished
+# stages (research, writer output, draft, newsletter), so a retried topic
+# resumes after them
+CHECKPOINT_KEY_PREFIX = "CHECKPOINT"
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+
 # Agent Configuration
 MAX_RETRIES = 3
 TEMPERATURE = 0.7
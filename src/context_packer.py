@@ -0,0 +1,238 @@
+"""Token-budgeted packing of research handed to the writer and editor."""
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.config.config import (
+    CONTEXT_CHARS_PER_TOKEN,
+    CONTEXT_MIN_TRUNCATED_TOKENS,
+    CONTEXT_SECTION_TOKEN_BUDGET,
+    DEFAULT_NEWSLETTER_SECTIONS,
+    SECTION_RESEARCH_SOURCES,
+)
+from src.tools.records import ResearchItem
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CONTEXT_CHARS_PER_TOKEN)
+
+
+def render_item(item: Any) -> str:
+    """Render one research item as a single line of context."""
+    if isinstance(item, ResearchItem):
+        parts = [f"[{item.title or item.url}]({item.url})"]
+        byline = ", ".join(part for part in (item.author, item.date) if part)
+        if byline:
+            parts.append(f"({byline})")
+        if item.snippet:
+            parts.append(f"- {item.snippet}")
+        if item.alternates:
+            parts.append(f"(also: {', '.join(item.alternates)})")
+        return " ".join(parts)
+    if isinstance(item, dict):
+        return json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str)
+    return str(item).strip()
+
+
+def item_value(item: Any, now: Optional[float] = None) -> float:
+    """
+    Score how much an item is worth keeping.
+
+    Records with engagement and a recent timestamp score higher; items that
+    are not records score zero so their original order decides.
+    """
+    if not isinstance(item, ResearchItem):
+        return 0.0
+    score = math.log1p(max(item.engagement, 0))
+    if item.timestamp is not None:
+        age_days = max(0.0, ((now or time.time()) - item.timestamp) / 86400)
+        score += 2.0 / (1.0 + age_days / 7)
+    if item.title and item.snippet:
+        score += 0.5
+    return score
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to roughly ``tokens`` tokens at a word boundary."""
+    limit = tokens * CONTEXT_CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit - 3)]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + "..."
+
+
+def sections_from_text(raw: str) -> Dict[str, List[Any]]:
+    """
+    Split free-form research output into sections of items.
+
+    The researcher is asked for JSON with a section per category; when the
+    output parses, each top-level key becomes a section. Otherwise the text is
+    split into paragraphs under a single "Research" section.
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw.strip())
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+
+    if isinstance(data, dict):
+        sections = {}
+        for key, value in data.items():
+            if isinstance(value, list):
+                sections[key] = value
+            elif isinstance(value, dict):
+                sections[key] = [{k: v} for k, v in value.items()]
+            elif isinstance(value, str):
+                sections[key] = [p for p in re.split(r"\n\s*\n", value) if p.strip()]
+            else:
+                sections[key] = [value]
+        return sections
+
+    return {"Research": [p for p in re.split(r"\n\s*\n", raw) if p.strip()]}
+
+
+def research_slice(
+    research_sections: Dict[str, List[Any]],
+    newsletter_section: str,
+    sources: Optional[Dict[str, List[str]]] = None
+) -> List[Any]:
+    """
+    Collect the research items one newsletter section should be written from.
+
+    Args:
+        research_sections: Research items keyed by research section title
+        newsletter_section: The newsletter section being written
+        sources: Mapping of newsletter sections to research sections,
+            defaults to SECTION_RESEARCH_SOURCES
+
+    Returns:
+        Items of the mapped research sections, without repeated URLs
+    """
+    sources = SECTION_RESEARCH_SOURCES if sources is None else sources
+    items = []
+    seen = set()
+    for research_section in sources.get(newsletter_section, [newsletter_section]):
+        for item in research_sections.get(research_section, []):
+            url = getattr(item, "url", None)
+            if url:
+                if url in seen:
+                    continue
+                seen.add(url)
+            items.append(item)
+    return items
+
+
+@dataclass
+class PackedContext:
+    """Research that fits the token budget, plus what packing it cost."""
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    tokens_used: int = 0
+    tokens_total: int = 0
+    items_kept: int = 0
+    items_truncated: int = 0
+    items_dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_total - self.tokens_used
+
+    def render(self) -> str:
+        """Render the packed research as markdown for a task description."""
+        blocks = []
+        for section, lines in self.sections.items():
+            if lines:
+                blocks.append(f"### {section}\n" + "\n".join(f"- {line}" for line in lines))
+        return "\n\n".join(blocks)
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "tokens_used": self.tokens_used,
+            "tokens_saved": self.tokens_saved,
+            "items_kept": self.items_kept,
+            "items_truncated": self.items_truncated,
+            "items_dropped": self.items_dropped,
+        }
+
+
+class ContextPacker:
+    """
+    Fit research into a per-section token budget.
+
+    Every section in ``newsletter_sections`` is worth ``section_budget``
+    tokens. Research sections named after a newsletter section get that
+    section's budget; the budget of newsletter sections with no research is
+    shared evenly by the remaining research sections. Within a section items
+    are taken in order of value, the first item that does not fit is
+    truncated if enough budget is left, and the rest are dropped. The same
+    input always packs the same way.
+    """
+    def __init__(
+        self,
+        section_budget: int = CONTEXT_SECTION_TOKEN_BUDGET,
+        newsletter_sections: Optional[List[str]] = None,
+        min_truncated_tokens: int = CONTEXT_MIN_TRUNCATED_TOKENS
+    ):
+        self.section_budget = section_budget
+        self.newsletter_sections = newsletter_sections or DEFAULT_NEWSLETTER_SECTIONS
+        self.min_truncated_tokens = min_truncated_tokens
+
+    def budgets(self, research_sections: List[str]) -> Dict[str, int]:
+        """Token budget for each research section."""
+        matched = [s for s in research_sections if s in self.newsletter_sections]
+        unmatched = [s for s in research_sections if s not in self.newsletter_sections]
+        spare = (len(self.newsletter_sections) - len(matched)) * self.section_budget
+        share = spare // len(unmatched) if unmatched else 0
+        return {s: self.section_budget if s in matched else share for s in research_sections}
+
+    def pack(self, research: Dict[str, List[Any]], now: Optional[float] = None) -> PackedContext:
+        """
+        Pack research sections into the budget.
+
+        Args:
+            research: Items (ResearchItem, dict or str) keyed by section title
+            now: Reference time for recency scoring, defaults to the current time
+
+        Returns:
+            PackedContext with the kept item lines and token accounting
+        """
+        now = now or time.time()
+        packed = PackedContext()
+        budgets = self.budgets(list(research))
+
+        for section, items in research.items():
+            remaining = budgets[section]
+            ranked = sorted(
+                enumerate(items),
+                key=lambda pair: (-item_value(pair[1], now), pair[0])
+            )
+            lines = []
+            for _, item in ranked:
+                line = render_item(item)
+                tokens = estimate_tokens(line)
+                packed.tokens_total += tokens
+                if not line:
+                    continue
+                if tokens <= remaining:
+                    lines.append(line)
+                    remaining -= tokens
+                    packed.items_kept += 1
+                    packed.tokens_used += tokens
+                elif remaining >= self.min_truncated_tokens:
+                    line = truncate_to_tokens(line, remaining)
+                    lines.append(line)
+                    packed.tokens_used += estimate_tokens(line)
+                    packed.items_truncated += 1
+                    remaining = 0
+                else:
+                    packed.items_dropped += 1
+            packed.sections[section] = lines
+
+        return packed
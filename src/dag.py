@@ -0,0 +1,156 @@
+"""Graph of pipeline stages memoized by a content hash of their inputs."""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config.config import (
+    STAGE_MEMO_BACKEND,
+    STAGE_MEMO_DIR,
+    STAGE_MEMO_MAX_ENTRIES,
+    STAGE_MEMO_MAX_STORED_ENTRIES,
+    STAGE_MEMO_STORE,
+)
+from src.memo import ContentMemo, create_memo
+from src.metrics import span
+from src.tools.cache import cache_key
+
+
+class StageMemo(ContentMemo):
+    """
+    Stage outputs keyed by the hash of the stage's inputs.
+
+    See ``ContentMemo`` for the memory and persistent tiers.
+    """
+    value_field = "output"
+
+    def __init__(self, persistent=None, max_entries: int = STAGE_MEMO_MAX_ENTRIES):
+        super().__init__(persistent, max_entries)
+
+
+def create_stage_memo(actor) -> StageMemo:
+    """Create a stage memo with the persistent tier chosen by STAGE_MEMO_BACKEND."""
+    return create_memo(
+        StageMemo, actor, STAGE_MEMO_BACKEND, STAGE_MEMO_STORE, STAGE_MEMO_DIR,
+        STAGE_MEMO_MAX_ENTRIES, STAGE_MEMO_MAX_STORED_ENTRIES
+    )
+
+
+@dataclass
+class Stage:
+    """
+    One node of a ``StageGraph``.
+
+    Attributes:
+        name: Unique name of the stage, e.g. "write:Latest News"
+        run: Called with the outputs of ``deps``, in order
+        deps: Stages whose outputs are this stage's inputs
+        params: Any other input of the stage (topic, model, prompt settings)
+        memoize: Whether the output is looked up in and saved to the memo;
+            the output must then be JSON-serializable and not None
+    """
+    name: str
+    run: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    params: Any = None
+    memoize: bool = False
+
+
+class StageGraph:
+    """
+    Runs stages in dependency order, reusing memoized outputs.
+
+    A stage's key hashes its name, ``params`` and the content hashes of its
+    dependencies' outputs. A memoized stage whose key is in the memo is not
+    run; its stored output is used instead. Stages that are not memoized
+    (scrapes that must see fresh data, cheap local steps) run every time,
+    but since keys hash the outputs of dependencies rather than their keys,
+    an output that did not change still lets every stage after it be reused.
+
+    Stages whose dependencies are ready run concurrently, each in a thread
+    carrying the caller's context (metrics recorder, time budget).
+    """
+    def __init__(self, memo: Optional[StageMemo] = None):
+        self.memo = memo
+        self.stages: Dict[str, Stage] = {}
+        self.outputs: Dict[str, Any] = {}
+        self.digests: Dict[str, str] = {}
+        self.reused: List[str] = []
+        self.executed: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        name: str,
+        run: Callable[..., Any],
+        deps: Tuple[str, ...] = (),
+        params: Any = None,
+        memoize: bool = False
+    ) -> None:
+        """Add a stage; its dependencies must already be added or provided, which keeps the graph acyclic."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already in the graph")
+        missing = [dep for dep in deps if dep not in self.stages and dep not in self.outputs]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages {missing}")
+        self.stages[name] = Stage(name, run, tuple(deps), params, memoize)
+
+    def provide(self, name: str, output: Any) -> None:
+        """Use ``output`` for a stage instead of running it, e.g. when it was checkpointed."""
+        self.outputs[name] = output
+        self.digests[name] = cache_key(output)
+
+    def run(self, *targets: str) -> Dict[str, Any]:
+        """
+        Run the targets and every stage they depend on that has not run yet.
+
+        Returns:
+            Outputs of the targets keyed by stage name
+        """
+        pending = self._needed(targets)
+        while pending:
+            ready = [name for name in pending if all(dep in self.outputs for dep in self.stages[name].deps)]
+            if len(ready) == 1:
+                self._execute(self.stages[ready[0]])
+            else:
+                with ThreadPoolExecutor(max_workers=len(ready), thread_name_prefix="stage") as pool:
+                    futures = [
+                        pool.submit(contextvars.copy_context().run, self._execute, self.stages[name])
+                        for name in ready
+                    ]
+                for future in futures:
+                    future.result()
+            pending = [name for name in pending if name not in ready]
+        return {name: self.outputs[name] for name in targets}
+
+    def _needed(self, targets) -> List[str]:
+        """Stages to run for ``targets``, in the order they were added."""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed or name in self.outputs:
+                continue
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage '{name}'")
+            needed.add(name)
+            stack.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def _execute(self, stage: Stage) -> None:
+        key = cache_key("stage", stage.name, stage.params, [self.digests[dep] for dep in stage.deps])
+        memo = self.memo if stage.memoize else None
+        with span("stage", stage.name) as stage_span:
+            output = memo.get(key) if memo is not None else None
+            reused = output is not None
+            if reused:
+                stage_span.cached = True
+            else:
+                output = stage.run(*(self.outputs[dep] for dep in stage.deps))
+                if memo is not None:
+                    memo.set(key, output)
+        with self._lock:
+            self.outputs[stage.name] = output
+            self.digests[stage.name] = cache_key(output)
+            (self.reused if reused else self.executed).append(stage.name)
@@ -0,0 +1,89 @@
+"""Persistent completion cache for the crew's LLM calls."""
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+
+from src.config.config import (
+    LLM_CACHE_BACKEND,
+    LLM_CACHE_DIR,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_STORED_ENTRIES,
+    LLM_CACHE_STORE,
+)
+from src.context_packer import estimate_tokens
+from src.memo import ContentMemo, create_memo
+from src.metrics import span
+from src.tools.cache import cache_key
+
+
+class CompletionCache(ContentMemo):
+    """
+    Completions keyed by model, temperature, stop words, messages and tools.
+
+    See ``ContentMemo`` for the memory and persistent tiers.
+    """
+    value_field = "completion"
+
+    def __init__(self, persistent=None, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        super().__init__(persistent, max_entries)
+
+    @staticmethod
+    def key(
+        model: str,
+        temperature: Optional[float],
+        messages: Union[str, List[Dict[str, Any]]],
+        tools: Optional[List[Dict]] = None,
+        stop: Optional[List[str]] = None
+    ) -> str:
+        return cache_key("completion", model, temperature, stop or [], messages, tools or [])
+
+
+class CachingLLM(LLM):
+    """
+    LLM that answers repeated prompts from a ``CompletionCache``.
+
+    Without a cache it behaves exactly like ``LLM``. Only plain text
+    completions are cached; results of executed function calls are not.
+    Every call is recorded as an "llm" span with estimated token counts.
+    """
+    def __init__(self, *args, completion_cache: Optional[CompletionCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.completion_cache = completion_cache
+
+    def call(self, messages, tools=None, *args, **kwargs):
+        with span("llm", str(self.model), prompt_tokens=_prompt_tokens(messages)) as llm_span:
+            result = self._cached_call(llm_span, messages, tools, *args, **kwargs)
+            if isinstance(result, str):
+                llm_span.completion_tokens = estimate_tokens(result)
+            return result
+
+    def _cached_call(self, llm_span, messages, tools=None, *args, **kwargs):
+        if self.completion_cache is None or kwargs.get("available_functions"):
+            return super().call(messages, tools, *args, **kwargs)
+
+        key = self.completion_cache.key(
+            self.model, self.temperature, messages, tools, getattr(self, "stop", None)
+        )
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            llm_span.cached = True
+            return cached
+
+        result = super().call(messages, tools, *args, **kwargs)
+        if isinstance(result, str) and result:
+            self.completion_cache.set(key, result)
+        return result
+
+
+def _prompt_tokens(messages: Union[str, List[Dict[str, Any]]]) -> int:
+    if isinstance(messages, str):
+        return estimate_tokens(messages)
+    return sum(estimate_tokens(str(message.get("content") or "")) for message in messages)
+
+
+def create_completion_cache(actor) -> CompletionCache:
+    """Create a completion cache with the persistent tier chosen by LLM_CACHE_BACKEND."""
+    return create_memo(
+        CompletionCache, actor, LLM_CACHE_BACKEND, LLM_CACHE_STORE, LLM_CACHE_DIR,
+        LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_STORED_ENTRIES
+    )
@@ -7,26 +7,179 @@ https://docs.apify.com/sdk/python
 """
 
 import os
+import json
 import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional
 from apify import Actor
+from crewai import LLM
 from dotenv import load_dotenv
+from src.budget import TimeBudget, budgeting
+from src.checkpoints import StageCheckpoints
+from src.dag import StageMemo, create_stage_memo
 from src.newsletter_crew import NewsletterCrew
+from src.llm_cache import create_completion_cache
+from src.metrics import MetricsRecorder, recording
+from src.run_state import RunState
+from src.tools.watermarks import WatermarkStore, create_watermark_store
+from src.config.config import (
+    BATCH_MAX_CONCURRENCY,
+    CHECKPOINTS_ENABLED,
+    GENERATION_MODES,
+    METRICS_JSON_KEY,
+    METRICS_PROMETHEUS_KEY,
+    RUN_MIGRATION_WAIT_SECS,
+)
+from src.tools.base import bind_event_loop
+from src.tools.batching import get_query_batcher
+from src.tools.coalescing import get_single_flight
 from datetime import datetime
 # Must precede any llm module imports
 
 from langtrace_python_sdk import langtrace
 langtrace.init(api_key = os.getenv("LANGTRACE_API_KEY"))
 
+DEFAULT_TOPIC = (
+    "I want to know everything about AI agents – current news, "
+    "AI agentic platforms and frameworks, and companies in this field."
+)
+
+
+def topics_from_input(actor_input: Dict) -> List[str]:
+    """
+    Collect the topics to generate newsletters for.
+    
+    Topics come from ``topic``, the ``topics`` list and ``topicsJsonl``, in
+    that order. Each JSONL line is either a JSON string or an object with a
+    ``topic`` field, or with ``title`` and ``body`` fields as in a request
+    backlog.
+    
+    Args:
+        actor_input: The Actor input
+        
+    Returns:
+        Non-empty list of topics, falling back to the default topic
+    """
+    topics = []
+    if actor_input.get('topic'):
+        topics.append(actor_input['topic'])
+    topics.extend(topic for topic in actor_input.get('topics') or [] if topic)
+    
+    for line in (actor_input.get('topicsJsonl') or '').splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if isinstance(entry, dict):
+            entry = entry.get('topic') or "\n\n".join(
+                part for part in (entry.get('title'), entry.get('body')) if part
+            )
+        if entry:
+            topics.append(entry)
+    
+    return topics or [DEFAULT_TOPIC]
+
+
+async def run_in_worker(executor: Executor, func, *args):
+    """
+    Run blocking crew code on ``executor`` without blocking the event loop.
+    
+    The current context (metrics recorder, time budget) is carried over to
+    the worker thread, as ``asyncio.to_thread`` would.
+    """
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(context.run, func, *args))
+
+
+async def generate_for_topic(
+    actor,
+    topic: str,
+    llm: LLM,
+    mode: str,
+    watermarks: WatermarkStore,
+    plan_queries: bool,
+    semaphore: asyncio.Semaphore,
+    metrics: MetricsRecorder,
+    budget: Optional[TimeBudget] = None,
+    executor: Optional[Executor] = None,
+    run_state: Optional[RunState] = None,
+    stage_memo: Optional[StageMemo] = None
+) -> Optional[str]:
+    """
+    Generate one newsletter and push it to the dataset as soon as it is done.
+    
+    The crew runs on a worker thread of ``executor`` so several topics can be
+    generated at once and the event loop stays free for platform events; its
+    scrapes are scheduled back onto the Actor's event loop and share the
+    process-wide scrape cache. Spans of every stage are recorded in
+    ``metrics`` and their summary is pushed with the newsletter. With a time
+    ``budget``, the stages share whatever is left of it when the topic starts.
+    Each finished stage is checkpointed, so a topic retried after a failure,
+    restart or migration resumes after the stages it already finished.
+    
+    Returns:
+        The newsletter, or None when ``run_state`` shows the topic was already
+        generated by an earlier attempt of the run or the run is migrating
+    """
+    async with semaphore:
+        if run_state is not None and run_state.is_done(topic):
+            actor.log.info(f'Skipping topic generated before a migration or restart: {topic}')
+            return None
+        if run_state is not None and run_state.migrating:
+            actor.log.info(f'Run is migrating, leaving topic for after the migration: {topic}')
+            return None
+        actor.log.info(f'Generating newsletter for topic: {topic}')
+        with recording(metrics), budgeting(budget):
+            try:
+                checkpoints = await StageCheckpoints(actor, topic, mode).load() if CHECKPOINTS_ENABLED else None
+                crew = NewsletterCrew(
+                    actor, llm=llm, mode=mode, watermarks=watermarks, plan_queries=plan_queries,
+                    checkpoints=checkpoints, stage_memo=stage_memo
+                )
+                newsletter_content = await run_in_worker(executor, crew.process_user_input, topic)
+            except Exception as e:
+                error_msg = f'Error in newsletter generation: {str(e)}'
+                actor.log.error(error_msg)
+                await actor.push_data({
+                    'topic': topic,
+                    'error': error_msg,
+                    'status': 'error',
+                    'metrics': metrics.summary(),
+                    'timestamp': datetime.now().isoformat()
+                })
+                raise
+        
+        print(newsletter_content)
+        await Actor.charge("generate-newsletter")
+        # Push the result to the actor's default dataset
+        await actor.push_data({
+            'topic': topic,
+            'content': str(newsletter_content),
+            'status': 'success',
+            'metrics': metrics.summary(),
+            'timestamp': datetime.now().isoformat()
+        })
+        if run_state is not None:
+            await run_state.mark_done(topic)
+        if checkpoints is not None:
+            await checkpoints.clear()
+        return newsletter_content
+
+
 async def main() -> None:
     """
     Main entry point for the newsletter generation system.
     
     This coroutine handles the initialization of the system, processes user input,
-    and generates the newsletter using the AI agent crew.
+    and generates one newsletter per topic using the AI agent crew, running up
+    to ``maxConcurrency`` topics at a time.
     """
     async with Actor as actor:
         try:
             actor.log.info('Initializing Newsletter Generation System...')
+            bind_event_loop()
             
             # Load environment variables
             load_dotenv()
@@ -40,37 +193,30 @@ async def main() -> None:
             
             # Get input from the actor
             actor_input = await actor.get_input() or {}
-            user_input = actor_input.get('topic')
-            
-            # Use default topic if none provided
-            if not user_input:
-                user_input = (
-                    "I want to know everything about AI agents – current news, "
-                    "AI agentic platforms and frameworks, and companies in this field."
-                )
+            topics = topics_from_input(actor_input)
+            if topics == [DEFAULT_TOPIC]:
                 actor.log.info("No topic provided, using default topic")
+            max_concurrency = max(1, int(actor_input.get('maxConcurrency') or BATCH_MAX_CONCURRENCY))
+            mode = actor_input.get('mode') or 'agents'
+            if mode not in GENERATION_MODES:
+                raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(GENERATION_MODES)}")
+            # Incremental scraping only applies to the modes that scrape directly
+            watermarks = create_watermark_store(actor) if actor_input.get('incremental') else None
+            # One LLM call plans the searches of every source
+            plan_queries = bool(actor_input.get('planQueries'))
+            # Deadline for the whole run, split across research, writing and editing
+            time_budget_secs = actor_input.get('timeBudgetSecs')
+            budget = TimeBudget(float(time_budget_secs)) if time_budget_secs else None
             
-            actor.log.info(f'Generating newsletter for topic: {user_input}')
+            # One LLM client (and optional completion cache) shared by every crew in the batch
+            completion_cache = create_completion_cache(actor) if actor_input.get('llmCache') else None
+            llm = NewsletterCrew.create_llm(completion_cache)
+            # Writer and editor outputs reused across runs while their inputs are unchanged
+            stage_memo = create_stage_memo(actor) if mode == 'memoized' else None
             
-            # Create the newsletter crew
-            crew = NewsletterCrew(actor)
-            
-            # Generate the newsletter
-            newsletter_content = crew.process_user_input(user_input)
-            print(newsletter_content)
-            # Check if the content indicates an error
-            # if newsletter_content.startswith("# Error Generating Newsletter"):
-            #     raise RuntimeError(newsletter_content)
-            await Actor.charge("generate-newsletter")
-            # Push the result to the actor's default dataset
-            await actor.push_data({
-                'topic': user_input,
-                'content': newsletter_content,
-                'status': 'success',
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            actor.log.info('Newsletter generation completed successfully!')
+            # Topics finished before a migration or restart are not generated again
+            run_state = await RunState(actor).load()
+            run_state.listen()
             
         except Exception as e:
             error_msg = f'Error in newsletter generation: {str(e)}'
@@ -78,13 +224,68 @@ async def main() -> None:
             
             # Push error information to the dataset
             await actor.push_data({
-                'topic': user_input if 'user_input' in locals() else None,
+                'topic': None,
                 'error': error_msg,
                 'status': 'error',
                 'timestamp': datetime.now().isoformat()
             })
             
             raise
+        
+        actor.log.info(f'Generating {len(topics)} newsletter(s), up to {max_concurrency} at a time')
+        semaphore = asyncio.Semaphore(max_concurrency)
+        topic_metrics = [MetricsRecorder() for _ in topics]
+        # Crews block for minutes, so they get threads of their own rather than the loop's default executor
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='newsletter-crew')
+        try:
+            results = await asyncio.gather(
+                *(
+                    generate_for_topic(
+                        actor, topic, llm, mode, watermarks, plan_queries, semaphore, metrics, budget,
+                        executor, run_state, stage_memo
+                    )
+                    for topic, metrics in zip(topics, topic_metrics)
+                ),
+                return_exceptions=True
+            )
+        finally:
+            executor.shutdown(wait=False)
+        
+        if completion_cache is not None:
+            actor.log.info(f'LLM completion cache: {completion_cache.stats()}')
+        if stage_memo is not None:
+            actor.log.info(f'Stage memo: {stage_memo.stats()}')
+        actor.log.info(f'Search query batching: {get_query_batcher().stats()}')
+        actor.log.info(f'Scrape coalescing: {get_single_flight().stats()}')
+        
+        # Run-wide metrics export for dashboards and scrapers
+        run_metrics = MetricsRecorder.combine(topic_metrics)
+        await actor.set_value(METRICS_JSON_KEY, run_metrics.summary())
+        await actor.set_value(
+            METRICS_PROMETHEUS_KEY, run_metrics.to_prometheus(), content_type='text/plain; version=0.0.4'
+        )
+        
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures and len(failures) == len(results):
+            raise failures[0]
+        unfinished = [
+            topic for topic, result in zip(topics, results)
+            if result is None and not run_state.is_done(topic)
+        ]
+        if unfinished:
+            # Topics left for after the migration; the resumed run generates them from RUN_STATE
+            actor.log.info(f'Waiting for the migration to resume {len(unfinished)} unfinished topic(s)')
+            await asyncio.sleep(RUN_MIGRATION_WAIT_SECS)
+            raise RuntimeError(
+                f'{len(unfinished)} topic(s) were left unfinished by a migration; '
+                f'rerun the Actor to generate them'
+            )
+        skipped = sum(result is None for result in results)
+        
+        actor.log.info(
+            f'Newsletter generation completed: {len(results) - len(failures) - skipped} succeeded, '
+            f'{len(failures)} failed, {skipped} skipped'
+        )
 
 if __name__ == "__main__":
     asyncio.run(main())
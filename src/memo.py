@@ -0,0 +1,75 @@
+"""Content-addressed memo of values shared by crews in worker threads."""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.tools.base import run_sync
+from src.tools.cache import MemoryTier, persistent_tier, read_persistent, write_persistent
+
+
+class ContentMemo:
+    """
+    Values keyed by a content hash of whatever produced them.
+
+    An LRU memory tier of ``max_entries`` values sits in front of an optional
+    persistent tier (Actor key-value store or local directory), so values
+    are reused by later runs; ``create_memo`` bounds that tier too. The memo
+    is called synchronously from crews running in different threads, so the
+    memory tier is guarded by a lock and the persistent tier is reached
+    through ``run_sync``. Subclasses set ``value_field``, the entry field
+    holding the value.
+    """
+    value_field = "value"
+
+    def __init__(self, persistent=None, max_entries: int = 256):
+        self.memory = MemoryTier(max_entries)
+        self.persistent = persistent
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under ``key``, or None on a miss."""
+        with self._lock:
+            entry = self.memory.get(key)
+        if entry is None and self.persistent is not None:
+            entry = run_sync(read_persistent(self.persistent, key))
+            if entry is not None:
+                with self._lock:
+                    self.memory.set(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[self.value_field]
+
+    def set(self, key: str, value: Any) -> None:
+        entry = {"stored_at": time.time(), self.value_field: value}
+        with self._lock:
+            self.memory.set(key, entry)
+        if self.persistent is not None:
+            run_sync(write_persistent(self.persistent, key, entry))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.memory)}
+
+
+def create_memo(
+    memo_class,
+    actor,
+    backend: str,
+    store_name: str,
+    directory: str,
+    max_entries: int,
+    max_stored_entries: int
+) -> ContentMemo:
+    """
+    Create a ``memo_class`` memo holding ``max_entries`` values in memory and
+    ``max_stored_entries`` in the persistent tier for ``backend`` (see
+    ``persistent_tier``).
+    """
+    persistent = persistent_tier(actor, backend, store_name, directory, max_stored_entries)
+    return memo_class(persistent=persistent, max_entries=max_entries)
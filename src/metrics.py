@@ -0,0 +1,225 @@
+"""Lightweight spans for per-stage timings and sizes of a newsletter run."""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Numeric span fields that are summed per (kind, name)
+_TOTALS = (
+    "wall_secs", "queue_secs", "run_secs", "items", "bytes",
+    "prompt_tokens", "completion_tokens", "retries", "hedges",
+)
+_PROMETHEUS_PREFIX = "newsletter_span"
+
+
+@dataclass
+class Span:
+    """
+    One timed operation.
+
+    Attributes:
+        kind: "scrape", "llm", "stage" or "task"
+        name: Actor ID, model, stage or task name
+        wall_secs: Wall time of the operation
+        queue_secs: Time spent waiting before the work started (for scrapes,
+            between calling the actor and the platform starting the run)
+        run_secs: Duration of the Apify run as reported by the platform
+        items: Dataset items returned
+        bytes: Serialized size of the returned payload
+        prompt_tokens: Estimated prompt tokens of an LLM call
+        completion_tokens: Estimated completion tokens of an LLM call
+        retries: Times a failed scrape was run again
+        hedges: Duplicate runs started for a slow scrape
+        cached: Whether the result came from a cache
+        coalesced: Whether the result was shared with an identical
+            request already in flight
+        partial: Whether the time budget cut the operation short and
+            only part of the result is available
+        error: Whether the operation failed
+    """
+    kind: str
+    name: str
+    wall_secs: float = 0.0
+    queue_secs: float = 0.0
+    run_secs: float = 0.0
+    items: int = 0
+    bytes: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    hedges: int = 0
+    cached: bool = False
+    coalesced: bool = False
+    partial: bool = False
+    error: bool = False
+
+
+class MetricsRecorder:
+    """Collects the spans of one newsletter, from any thread."""
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @classmethod
+    def combine(cls, recorders: Iterable["MetricsRecorder"]) -> "MetricsRecorder":
+        """A recorder holding the spans of several recorders, e.g. every topic of a batch."""
+        combined = cls()
+        for recorder in recorders:
+            combined.spans.extend(recorder.spans)
+        return combined
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate the spans per kind and name.
+
+        Returns:
+            Dict with the span count and, under "spans", one entry per
+            "<kind>:<name>" with the call, error, cache hit, coalesced and
+            partial counts, the largest wall time and the totals of every
+            numeric field
+        """
+        with self._lock:
+            spans = list(self.spans)
+        entries: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            entry = entries.setdefault(f"{span.kind}:{span.name}", {
+                "kind": span.kind, "name": span.name, "count": 0, "errors": 0,
+                "cache_hits": 0, "coalesced": 0, "partial": 0, "max_wall_secs": 0.0, **{total: 0 for total in _TOTALS},
+            })
+            entry["count"] += 1
+            entry["errors"] += int(span.error)
+            entry["cache_hits"] += int(span.cached)
+            entry["coalesced"] += int(span.coalesced)
+            entry["partial"] += int(span.partial)
+            entry["max_wall_secs"] = max(entry["max_wall_secs"], round(span.wall_secs, 3))
+            for total in _TOTALS:
+                entry[total] += getattr(span, total)
+        for entry in entries.values():
+            for total in _TOTALS:
+                if isinstance(entry[total], float):
+                    entry[total] = round(entry[total], 3)
+        return {"span_count": len(spans), "spans": entries}
+
+    def to_json(self, include_spans: bool = False) -> str:
+        data = self.summary()
+        if include_spans:
+            with self._lock:
+                data["raw_spans"] = [asdict(span) for span in self.spans]
+        return json.dumps(data, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Render the summary in the Prometheus text exposition format."""
+        entries = self.summary()["spans"].values()
+        metrics = [("count", "count", "Number of spans"),
+                   ("errors", "errors_total", "Spans that failed"),
+                   ("cache_hits", "cache_hits_total", "Spans answered from a cache"),
+                   ("coalesced", "coalesced_total", "Spans that shared an identical in-flight call"),
+                   ("partial", "partial_total", "Spans cut short by the time budget")]
+        metrics += [(total, f"{total}_total", f"Sum of span {total}") for total in _TOTALS]
+
+        lines = []
+        for key, suffix, help_text in metrics:
+            metric = f"{_PROMETHEUS_PREFIX}_{suffix}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {'gauge' if key == 'count' else 'counter'}")
+            for entry in entries:
+                labels = f'kind="{_escape(entry["kind"])}",name="{_escape(entry["name"])}"'
+                lines.append(f"{metric}{{{labels}}} {entry[key]}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_recorder: contextvars.ContextVar[Optional[MetricsRecorder]] = contextvars.ContextVar("metrics_recorder", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("metrics_span", default=None)
+
+
+def current_recorder() -> Optional[MetricsRecorder]:
+    return _recorder.get()
+
+
+@contextmanager
+def recording(recorder: MetricsRecorder) -> Iterator[MetricsRecorder]:
+    """
+    Record spans of the current context into ``recorder``.
+
+    The recorder follows the context into ``asyncio`` tasks,
+    ``asyncio.to_thread`` workers and coroutines scheduled with ``run_sync``,
+    so spans from every stage of a newsletter end up in the same place.
+    """
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str, **fields) -> Iterator[Span]:
+    """
+    Time the enclosed block as a span of the current recorder.
+
+    The span is yielded (and available to nested code through ``annotate``)
+    so sizes can be filled in as they become known. It is marked as an
+    error if the block raises. Without a recorder the span is simply dropped.
+    """
+    current = Span(kind=kind, name=name, **fields)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except GeneratorExit:
+        # A generator closed early by its consumer has not failed
+        raise
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        current.wall_secs = time.perf_counter() - start
+        _current_span.reset(token)
+        recorder = _recorder.get()
+        if recorder is not None:
+            recorder.add(current)
+
+
+def annotate(**fields) -> None:
+    """Set fields on the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        for key, value in fields.items():
+            setattr(current, key, value)
+
+
+def record_tasks(tasks: List[Any], names: List[str]) -> None:
+    """
+    Record finished crewai tasks as "task" spans.
+
+    Wall time comes from the tasks' own start and end times, completion
+    tokens are estimated from their raw output.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return
+    # Imported here: the context packer imports the tools package, which records spans
+    from src.context_packer import estimate_tokens
+
+    for task, name in zip(tasks, names):
+        started = getattr(task, "start_time", None)
+        ended = getattr(task, "end_time", None)
+        output = getattr(task, "output", None)
+        recorder.add(Span(
+            kind="task",
+            name=name,
+            wall_secs=(ended - started).total_seconds() if started and ended else 0.0,
+            completion_tokens=estimate_tokens(str(getattr(output, "raw", "") or "")) if output else 0,
+            error=output is None,
+        ))
@@ -1,46 +1,122 @@
 """Newsletter Crew that coordinates the agents to generate the newsletter."""
-from typing import Dict, List
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Optional
 from crewai import Crew, Task, LLM
 from src.agents.researcher import ResearcherAgent
 from src.agents.writer import WriterAgent
 from src.agents.editor import EditorAgent
-from src.config.config import DEFAULT_NEWSLETTER_SECTIONS
+from src.budget import stage_budget, time_left
+from src.checkpoints import StageCheckpoints, research_from_dict, research_to_dict
+from src.config.config import (
+    DEFAULT_NEWSLETTER_SECTIONS,
+    GENERATION_MODES,
+    RANKING_TOP_K_PER_SECTION,
+    TIME_BUDGET_MIN_LLM_SECS,
+)
+from src.dag import StageGraph, StageMemo
+from src.context_packer import ContextPacker, research_slice, sections_from_text
+from src.llm_cache import CachingLLM, CompletionCache
+from src.metrics import record_tasks, span
+from src.planner import QueryPlan, QueryPlanner
+from src.ranking import RelevanceRanker
+from src.tools.base import run_sync
+from src.tools.watermarks import WatermarkStore
 import os
 
 class NewsletterCrew:
-    def __init__(self, actor):
+    def __init__(
+        self,
+        actor,
+        packer: ContextPacker = None,
+        llm: LLM = None,
+        mode: str = "agents",
+        watermarks: WatermarkStore = None,
+        plan_queries: bool = False,
+        checkpoints: StageCheckpoints = None,
+        stage_memo: StageMemo = None
+    ):
+        if mode not in GENERATION_MODES:
+            raise ValueError(f"Unknown generation mode '{mode}', expected one of {GENERATION_MODES}")
+        self.mode = mode
+        self.watermarks = watermarks
+        self.plan_queries = plan_queries
+        self.checkpoints = checkpoints
+        self.stage_memo = stage_memo
+        
         # Initialize agents
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash-lite",
-            temperature=0.7,
-            api_key=os.getenv("GOOGLE_API_KEY"),  # Make sure to set this in your .env file
-            verbose=False  # Suppress LLM output
-        )
+        self.llm = llm or self.create_llm()
         self.actor = actor
         self.researcher = ResearcherAgent.create(self.llm, self.actor)
         self.writer = WriterAgent.create(self.llm)
         self.editor = EditorAgent.create(self.llm)
+        self.packer = packer or ContextPacker()
+        self.ranker = RelevanceRanker()
+        self.context_report: Dict[str, int] = {}
+        self._report_lock = threading.Lock()
         
-        # Create the crew
+        # Create the crews: research runs on its own so its output can be
+        # packed into the token budget before writing and editing
+        self.research_crew = Crew(
+            agents=[self.researcher],
+            tasks=[],
+            verbose=True
+        )
         self.crew = Crew(
-            agents=[self.researcher, self.writer, self.editor],
+            agents=[self.writer, self.editor],
             tasks=[],
             verbose=True
         )
 
+    @staticmethod
+    def create_llm(completion_cache: CompletionCache = None) -> LLM:
+        """
+        Create the LLM client used by all agents of a crew.
+        
+        Args:
+            completion_cache: Optional cache answering repeated prompts
+        """
+        return CachingLLM(
+            model="gemini/gemini-2.0-flash-lite",
+            temperature=0.7,
+            api_key=os.getenv("GOOGLE_API_KEY"),  # Make sure to set this in your .env file
+            verbose=False,  # Suppress LLM output
+            completion_cache=completion_cache
+        )
+
     def generate_newsletter(self, topic: str) -> str:
         """
         Generate a complete newsletter about the given topic.
         
+        With ``checkpoints``, every finished stage is saved as it completes
+        and stages an earlier attempt already finished are skipped.
+        
         Args:
             topic: The main topic for the newsletter
             
         Returns:
             Markdown formatted newsletter content
         """
-        self.actor.log.info(f"Generating newsletter for topic: {topic}")
-        tasks = []
+        self.actor.log.info(f"Generating newsletter for topic: {topic} ({self.mode} mode)")
+        self.context_report = {}
+        return self._checkpointed("newsletter", lambda: str(self._generate(topic)))
+
+    def _generate(self, topic: str):
+        if self.mode == "fast":
+            return self._generate_fast(topic)
+        if self.mode == "parallel":
+            return self._generate_parallel(topic)
+        if self.mode == "memoized":
+            return self._generate_memoized(topic)
+        return self._generate_with_agents(topic)
+
+    def _generate_with_agents(self, topic: str) -> str:
+        """
+        Research, write and edit through the agent crew.
         
+        Research is the agent's tool-calling loop, or a single query plan
+        scraped directly when query planning is enabled.
+        """
         # Research task
         research_task = Task(
             description=f"Research comprehensive information about {topic}. Focus on latest news, developments, and trends.",
@@ -53,25 +129,59 @@ class NewsletterCrew:
             Format: JSON with sections for each category""",
             agent=self.researcher
         )
-        tasks.append(research_task)
-        
-        # Writing task
-        writing_task = Task(
-            description="Transform the research data into engaging newsletter sections",
-            expected_output=f"""A well-structured newsletter draft with:
-            1. Clear section headers
-            2. Engaging content for each section
-            3. Proper markdown formatting
-            4. Links to sources
-            Format: Markdown with proper headers and formatting
-            Use the research to create content for sections: {', '.join(DEFAULT_NEWSLETTER_SECTIONS)}""",
-            agent=self.writer,
-        )
-        tasks.append(writing_task)
+        self.research_crew.tasks = [research_task]
+        
+        research = None
+        if self.plan_queries:
+            # The plan replaces the research agent's tool-calling loop
+            research = self._research(topic)
+            research_context = self.pack_research(research["sections"])
+        else:
+            try:
+                with stage_budget("research"):
+                    research_output = self._checkpointed(
+                        "research_text", lambda: str(self._kickoff(self.research_crew, "research", ["research"]))
+                    )
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                self.actor.log.error(f"Error in newsletter research: {str(e)}")
+                raise
+            
+            research_context = self.pack_research(sections_from_text(research_output))
+        tasks = []
+        task_names = []
+        
+        # Writing task, saved as soon as it finishes so a failed edit does not write again
+        draft = self._saved("write")
+        if draft is None:
+            writing_task = Task(
+                description=f"""Transform the research data into engaging newsletter sections about {topic}.
+                
+                Research:
+                {research_context}""",
+                expected_output=f"""A well-structured newsletter draft with:
+                1. Clear section headers
+                2. Engaging content for each section
+                3. Proper markdown formatting
+                4. Links to sources
+                Format: Markdown with proper headers and formatting
+                Use the research to create content for sections: {', '.join(DEFAULT_NEWSLETTER_SECTIONS)}""",
+                agent=self.writer,
+                callback=self._checkpoint_task("write")
+            )
+            tasks.append(writing_task)
+            task_names.append("write")
         
         # Editing task
+        editing_description = "Review, improve, and finalize the newsletter content"
+        if draft is not None:
+            editing_description += f"""
+            
+            Draft:
+            {draft}"""
         editing_task = Task(
-            description="Review, improve, and finalize the newsletter content",
+            description=editing_description,
             expected_output="""A polished newsletter with:
             1. Professional formatting
             2. Consistent style
@@ -82,13 +192,18 @@ class NewsletterCrew:
             agent=self.editor
         )
         tasks.append(editing_task)
+        task_names.append("edit")
         
         # Update crew tasks
         self.crew.tasks = tasks
         
         try:
-            # Execute the tasks
-            result = self.crew.kickoff()
+            with stage_budget("write", "edit"):
+                # Only scraped research can be formatted without the writer
+                if research is not None and self._out_of_time("writing"):
+                    return self._compose(topic, research, polish=False)
+                # Execute the tasks
+                result = self._kickoff(self.crew, "write_and_edit", task_names)
             return result
         except Exception as e:
             import traceback
@@ -96,6 +211,323 @@ class NewsletterCrew:
             self.actor.log.error(f"Error in newsletter generation: {str(e)}")
             raise
 
+    def _generate_fast(self, topic: str) -> str:
+        """
+        Generate the newsletter without the tool-calling agents.
+        
+        Research is gathered by scraping every source concurrently, sections
+        are formatted locally and checked by the rule-based review, and the
+        LLM is called once to polish the assembled draft.
+        """
+        return self._compose(topic, self._research(topic))
+
+    def _compose(self, topic: str, research: Dict, polish: bool = True) -> str:
+        """
+        Format the research into a newsletter locally, optionally polished by the LLM.
+        
+        Polishing is skipped when the time budget left for editing is too short.
+        """
+        section_titles = [title for title in DEFAULT_NEWSLETTER_SECTIONS if research["sections"].get(title)]
+        section_titles += [
+            title for title, items in research["sections"].items()
+            if items and title not in DEFAULT_NEWSLETTER_SECTIONS
+        ]
+        with stage_budget("write"):
+            review = self._checkpointed("draft", lambda: self._draft(research, section_titles))
+        content = review["improved_content"]
+        with stage_budget("edit"):
+            if polish and not self._out_of_time("polishing"):
+                try:
+                    with span("stage", "polish"):
+                        content = EditorAgent.polish(self.llm, topic, content, review["suggestions"])
+                except Exception as e:
+                    self.actor.log.warning(f"Polishing failed, publishing the reviewed draft: {str(e)}")
+        
+        return EditorAgent.finalize_newsletter(content, {"topic": topic, "summary": research["summary"]})
+
+    @staticmethod
+    def _draft(research: Dict, section_titles: List[str]) -> Dict:
+        """Format the research sections locally and review the draft."""
+        with span("stage", "write"):
+            draft = WriterAgent.format_markdown("\n\n".join(
+                WriterAgent.create_section_content(title, research) for title in section_titles
+            ))
+            return EditorAgent.review_content(draft)
+
+    def _generate_parallel(self, topic: str) -> str:
+        """
+        Generate the newsletter with one concurrently executed writer task per section.
+        
+        Each section task only sees its own slice of the research, so the
+        writing phase takes about as long as the longest section. The editor
+        task then stitches the section drafts together.
+        """
+        research = self._research(topic)
+        
+        section_names = []
+        section_tasks = []
+        # Sections written by an earlier attempt go straight to the editor
+        written = {}
+        for section in DEFAULT_NEWSLETTER_SECTIONS:
+            saved = self._saved(f"write:{section}")
+            if saved is not None:
+                section_names.append(section)
+                written[section] = saved
+                continue
+            items = self.ranker.top_k(
+                f"{topic} {section}",
+                research_slice(research["sections"], section),
+                RANKING_TOP_K_PER_SECTION
+            )
+            if not items:
+                continue
+            section_context = self.pack_research({section: items})
+            section_names.append(section)
+            section_tasks.append(Task(
+                description=f"""Write the "{section}" section of a newsletter about {topic}.
+                
+                Research for this section:
+                {section_context}""",
+                expected_output=f"""The "{section}" section in markdown:
+                1. Starts with the header "## {section}"
+                2. Engaging, accurate content based only on the research above
+                3. Links to the sources""",
+                agent=self.writer,
+                async_execution=True,
+                context=[],
+                callback=self._checkpoint_task(f"write:{section}")
+            ))
+        
+        if not section_names:
+            raise RuntimeError(f"No research found for topic: {topic}")
+        
+        editing_description = f"""Stitch the newsletter sections about {topic} into one newsletter.
+            Keep the sections in this order: {', '.join(section_names)}.
+            Add a short introduction, remove repetition between sections and keep all links."""
+        if written:
+            earlier = "\n\n".join(written[section] for section in section_names if section in written)
+            editing_description += f"""
+            
+            Sections written earlier:
+            {earlier}"""
+        editing_task = Task(
+            description=editing_description,
+            expected_output="""A polished newsletter with:
+            1. Professional formatting
+            2. Consistent style
+            3. Error-free content
+            4. Proper metadata and structure
+            5. All the links to the sources in the content
+            Format: Final markdown document ready for distribution""",
+            agent=self.editor,
+            context=section_tasks
+        )
+        
+        self.crew.tasks = section_tasks + [editing_task]
+        try:
+            with stage_budget("write", "edit"):
+                if self._out_of_time("writing"):
+                    return self._compose(topic, research, polish=False)
+                return self._kickoff(
+                    self.crew, "write_and_edit",
+                    [f"write:{section}" for section in section_names if section not in written] + ["edit"]
+                )
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.actor.log.error(f"Error in newsletter generation: {str(e)}")
+            raise
+
+    def _generate_memoized(self, topic: str) -> str:
+        """
+        Generate the newsletter as a graph of memoized stages.
+        
+        Every source is scraped as a stage of its own and the results are
+        assembled into the research, which is sliced per newsletter section.
+        Each slice feeds a writer stage, and the editor stage stitches the
+        sections together. Writer and editor stages are memoized by a content
+        hash of their inputs, so a regenerated newsletter only writes the
+        sections whose research changed, and is only edited again when one did.
+        """
+        graph = StageGraph(self.stage_memo)
+        llm_params = (str(self.llm.model), self.llm.temperature)
+        with stage_budget("research"):
+            research = self._checkpointed(
+                "research", lambda: self._research_stages(graph, topic), research_to_dict, research_from_dict
+            )
+        graph.provide("research", research)
+        
+        write_stages = []
+        for section in DEFAULT_NEWSLETTER_SECTIONS:
+            graph.add(f"slice:{section}", functools.partial(self._slice_section, topic, section), deps=("research",))
+            graph.add(
+                f"write:{section}",
+                functools.partial(self._write_section, topic, section),
+                deps=(f"slice:{section}",),
+                params=(topic, section, *llm_params),
+                memoize=True
+            )
+            write_stages.append(f"write:{section}")
+        graph.add(
+            "edit",
+            lambda *sections: EditorAgent.polish(self.llm, topic, "\n\n".join(filter(None, sections))),
+            deps=tuple(write_stages),
+            params=(topic, *llm_params),
+            memoize=True
+        )
+        
+        with stage_budget("write", "edit"):
+            if self._out_of_time("writing"):
+                return self._compose(topic, research, polish=False)
+            with stage_budget("write"):
+                sections = [section for section in graph.run(*write_stages).values() if section]
+            if not sections:
+                raise RuntimeError(f"No research found for topic: {topic}")
+            content = "\n\n".join(sections)
+            with stage_budget("edit"):
+                if not self._out_of_time("editing"):
+                    try:
+                        content = graph.run("edit")["edit"]
+                    except Exception as e:
+                        self.actor.log.warning(f"Editing failed, publishing the unedited sections: {str(e)}")
+        
+        self.actor.log.info(
+            f"Stage graph: {len(graph.reused)} stage(s) reused, {len(graph.executed)} run "
+            f"(reused: {', '.join(graph.reused) or 'none'})"
+        )
+        return EditorAgent.finalize_newsletter(content, {"topic": topic, "summary": research["summary"]})
+
+    def _research_stages(self, graph: StageGraph, topic: str) -> Dict:
+        """Add one scrape stage per source and the stage assembling them, and run them."""
+        plan = self.plan_research(topic)
+        sources = ResearcherAgent.research_sources(topic, self.actor, plan)
+        sections = [section for section, _, _, _ in sources]
+        for section, tool, kwargs, _ in sources:
+            graph.add(
+                f"scrape:{section}",
+                functools.partial(ResearcherAgent.scrape_source, topic, section, tool, kwargs, self.watermarks)
+            )
+        graph.add(
+            "research",
+            lambda *collected: ResearcherAgent.assemble_results(topic, sources, dict(zip(sections, collected))),
+            deps=tuple(f"scrape:{section}" for section in sections)
+        )
+        return graph.run("research")["research"]
+
+    def _slice_section(self, topic: str, section: str, research: Dict) -> str:
+        """Packed research context of one newsletter section, empty when it has no research."""
+        items = self.ranker.top_k(
+            f"{topic} {section}",
+            research_slice(research["sections"], section),
+            RANKING_TOP_K_PER_SECTION
+        )
+        return self.pack_research({section: items}) if items else ""
+
+    def _write_section(self, topic: str, section: str, research_context: str) -> str:
+        if not research_context:
+            return ""
+        return WriterAgent.write_section(self.llm, topic, section, research_context)
+
+    def plan_research(self, topic: str) -> Optional[QueryPlan]:
+        """Compile a query plan for the topic when query planning is enabled."""
+        if not self.plan_queries:
+            return None
+        with span("stage", "plan"):
+            plan = QueryPlanner(self.llm).plan(topic)
+        self.actor.log.info(f"Query plan ({'planned' if plan.planned else 'fallback'}): {plan.to_dict()}")
+        return plan
+
+    def _research(self, topic: str) -> Dict:
+        """
+        Scrape every source concurrently, following the query plan if there is one.
+        
+        Planning and scraping share the research stage's time budget; scrapes
+        still running when it is spent contribute what they have so far.
+        """
+        with stage_budget("research"):
+            return self._checkpointed(
+                "research", lambda: self._scrape_research(topic), research_to_dict, research_from_dict
+            )
+
+    def _scrape_research(self, topic: str) -> Dict:
+        plan = self.plan_research(topic)
+        with span("stage", "research"):
+            return ResearcherAgent.research_topic(
+                topic, self.actor, concurrent=True, watermarks=self.watermarks, plan=plan
+            )
+
+    def _checkpointed(self, stage: str, run: Callable[[], Any], encode=None, decode=None) -> Any:
+        """
+        Return a stage's output from the checkpoints, or run the stage and checkpoint its output.
+        
+        Args:
+            stage: Checkpoint name of the stage
+            run: Runs the stage
+            encode: Turns the output into JSON-serializable data, if needed
+            decode: Restores the output from that data
+        """
+        saved = self._saved(stage)
+        if saved is not None:
+            return decode(saved) if decode else saved
+        output = run()
+        self._checkpoint(stage, encode(output) if encode else output)
+        return output
+
+    def _saved(self, stage: str) -> Optional[Any]:
+        """A stage's checkpointed output, or None when no earlier attempt finished it."""
+        saved = self.checkpoints.get(stage) if self.checkpoints is not None else None
+        if saved is not None:
+            self.actor.log.info(f"Resuming after the checkpointed {stage} stage")
+        return saved
+
+    def _checkpoint(self, stage: str, output: Any) -> None:
+        if self.checkpoints is not None:
+            run_sync(self.checkpoints.save(stage, output))
+
+    def _checkpoint_task(self, stage: str) -> Callable[[Any], None]:
+        """Task callback checkpointing a crew task's output as soon as the task finishes."""
+        return lambda output: self._checkpoint(stage, str(output.raw))
+
+    def _out_of_time(self, step: str) -> bool:
+        """Whether the current stage has too little of the time budget left for an LLM ``step``."""
+        left = time_left()
+        if left is None or left >= TIME_BUDGET_MIN_LLM_SECS:
+            return False
+        self.actor.log.warning(f"Time budget nearly spent ({left:.0f}s left), skipping {step}")
+        return True
+
+    def _kickoff(self, crew: Crew, stage: str, task_names: List[str]):
+        """Run a crew as a timed stage, recording each of its tasks as a span."""
+        try:
+            with span("stage", stage):
+                return crew.kickoff()
+        finally:
+            record_tasks(crew.tasks, task_names)
+
+    def pack_research(self, research: Dict[str, List]) -> str:
+        """
+        Fit research sections into the context budget and render them.
+        
+        Args:
+            research: Research items keyed by section title
+            
+        Returns:
+            Markdown research context for the writer; the token accounting is
+            added up in ``context_report``
+        """
+        with span("stage", "pack") as pack_span:
+            packed = self.packer.pack(research)
+            pack_span.prompt_tokens = packed.tokens_used
+        with self._report_lock:
+            for key, value in packed.report().items():
+                self.context_report[key] = self.context_report.get(key, 0) + value
+        self.actor.log.info(
+            f"Packed research context: {packed.tokens_used} tokens used, "
+            f"{packed.tokens_saved} saved ({packed.items_kept} kept, "
+            f"{packed.items_truncated} truncated, {packed.items_dropped} dropped)"
+        )
+        return packed.render()
+
     def process_user_input(self, user_input: str) -> str:
         """
         Process user input and generate a newsletter.
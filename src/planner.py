@@ -0,0 +1,167 @@
+"""Single-call query planning for the research scrapes."""
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.config.config import (
+    PLANNER_DEFAULT_WINDOW_DAYS,
+    PLANNER_MAX_QUERIES,
+    PLANNER_MAX_WINDOW_DAYS,
+)
+
+# Plan fields holding search terms, with what each one is used for
+_QUERY_FIELDS = {
+    "google_queries": "Google web searches",
+    "news_keywords": "Google News keywords",
+    "reddit_searches": "Reddit post searches",
+    "subreddits": "subreddit names without the r/ prefix",
+    "twitter_terms": "Twitter/X search terms",
+    "youtube_queries": "YouTube searches",
+}
+# Sources a date window can be set for
+WINDOW_SOURCES = ("google", "news", "reddit", "twitter", "youtube")
+
+
+@dataclass
+class QueryPlan:
+    """
+    What to scrape for a topic, compiled up front for every source.
+
+    Attributes:
+        google_queries: Google Search queries
+        news_keywords: Google News keywords
+        reddit_searches: Reddit search terms
+        subreddits: Subreddits to search in addition to all of Reddit
+        twitter_terms: Twitter/X search terms
+        youtube_queries: YouTube search queries
+        window_days: How many days back to search, per source
+        planned: Whether the plan came from the LLM rather than the fallback
+    """
+    google_queries: List[str] = field(default_factory=list)
+    news_keywords: List[str] = field(default_factory=list)
+    reddit_searches: List[str] = field(default_factory=list)
+    subreddits: List[str] = field(default_factory=list)
+    twitter_terms: List[str] = field(default_factory=list)
+    youtube_queries: List[str] = field(default_factory=list)
+    window_days: Dict[str, int] = field(default_factory=dict)
+    planned: bool = False
+
+    @classmethod
+    def fallback(cls, topic: str) -> "QueryPlan":
+        """The plan used without planning: the topic itself for every source."""
+        query = " ".join(topic.split())
+        return cls(
+            google_queries=[query],
+            news_keywords=[query],
+            reddit_searches=[query],
+            twitter_terms=[query],
+            youtube_queries=[query],
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], topic: str) -> "QueryPlan":
+        """
+        Build a plan from parsed LLM output.
+
+        Terms are cleaned, de-duplicated and capped at PLANNER_MAX_QUERIES per
+        source; sources the LLM left empty fall back to the topic, and windows
+        are clamped to 1..PLANNER_MAX_WINDOW_DAYS days.
+        """
+        fallback = cls.fallback(topic)
+        plan = cls(planned=True)
+        for name in _QUERY_FIELDS:
+            values = data.get(name) or []
+            if isinstance(values, str):
+                values = [values]
+            terms = []
+            for value in values:
+                term = " ".join(str(value).split())
+                if name == "subreddits":
+                    term = re.sub(r"^/?r/", "", term).strip("/")
+                if term and term not in terms:
+                    terms.append(term)
+            setattr(plan, name, terms[:PLANNER_MAX_QUERIES] or getattr(fallback, name))
+
+        windows = data.get("window_days") or {}
+        if isinstance(windows, dict):
+            for source in WINDOW_SOURCES:
+                try:
+                    days = int(windows[source])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                plan.window_days[source] = min(max(days, 1), PLANNER_MAX_WINDOW_DAYS)
+        return plan
+
+    def window(self, source: str) -> int:
+        return self.window_days.get(source, PLANNER_DEFAULT_WINDOW_DAYS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class QueryPlanner:
+    """Turns a topic into a ``QueryPlan`` with one LLM call."""
+    def __init__(self, llm):
+        self.llm = llm
+
+    def messages(self, topic: str) -> List[Dict[str, str]]:
+        fields = "\n".join(
+            f'- "{name}": up to {PLANNER_MAX_QUERIES} {description}'
+            for name, description in _QUERY_FIELDS.items()
+        )
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You plan web research for a technology newsletter. You turn a "
+                    "request into short, specific search queries for each source."
+                )
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Newsletter request: {topic}\n\n"
+                    "Reply with a single JSON object and nothing else, with these fields:\n"
+                    f"{fields}\n"
+                    '- "window_days": an object with how many days back to search for '
+                    f'each of {", ".join(WINDOW_SOURCES)}\n'
+                    "Prefer short queries of two to five words that cover different "
+                    "aspects of the request."
+                )
+            }
+        ]
+
+    def plan(self, topic: str) -> QueryPlan:
+        """
+        Plan the research for a topic.
+
+        Returns:
+            The LLM's plan, or ``QueryPlan.fallback`` when the call fails or
+            its output is not a JSON object
+        """
+        try:
+            output = self.llm.call(self.messages(topic))
+        except Exception as e:
+            print(f"Query planning failed, using the topic as query: {str(e)}")
+            return QueryPlan.fallback(topic)
+
+        data = parse_json_object(str(output))
+        if data is None:
+            print("Query plan was not valid JSON, using the topic as query")
+            return QueryPlan.fallback(topic)
+        return QueryPlan.from_dict(data, topic)
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the first JSON object in LLM output, ignoring code fences and chatter."""
+    text = re.sub(r"```(?:json)?", "", text)
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
@@ -0,0 +1,148 @@
+"""Relevance ranking of research items across sources."""
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config.config import (
+    RANKING_BM25_B,
+    RANKING_BM25_K1,
+    RANKING_MISSING_RECENCY,
+    RANKING_RECENCY_HALF_LIFE_DAYS,
+    RANKING_WEIGHTS,
+)
+from src.tools.records import ResearchItem
+
+_STOPWORDS = frozenset("""
+a about above after all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each everything few
+for from further had has have having he her here hers him his how i if in into is it
+its itself just know latest me more most my no nor not now of off on once only or other
+our out over own same she should so some such than that the their them then there these
+they this those through to too under until up very want was we were what when where
+which while who whom why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords."""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in _STOPWORDS]
+
+
+class RelevanceRanker:
+    """
+    Scores research items against a query in one vectorized pass.
+
+    The score is a weighted sum of three features, each scaled to [0, 1]:
+    BM25 relevance of title and snippet to the query, exponential recency
+    decay, and log engagement relative to the best item from the same source
+    (so Reddit votes are not compared with YouTube views).
+    """
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        k1: float = RANKING_BM25_K1,
+        b: float = RANKING_BM25_B,
+        half_life_days: float = RANKING_RECENCY_HALF_LIFE_DAYS
+    ):
+        self.weights = weights or RANKING_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.half_life_days = half_life_days
+
+    def relevance(self, query: str, items: Sequence[ResearchItem]) -> np.ndarray:
+        """BM25 score of every item for the query terms, scaled to [0, 1]."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores = np.zeros(len(items))
+        if not terms or not items:
+            return scores
+
+        vocab = {term: index for index, term in enumerate(terms)}
+        docs = [tokenize(f"{item.title} {item.snippet}") for item in items]
+        lengths = np.array([len(doc) for doc in docs], dtype=float)
+
+        rows, cols = [], []
+        for row, doc in enumerate(docs):
+            for token in doc:
+                col = vocab.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        tf = np.zeros((len(items), len(terms)))
+        np.add.at(tf, (np.array(rows, dtype=int), np.array(cols, dtype=int)), 1.0)
+
+        n_docs = len(items)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avg_length = lengths.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        scores = (idf * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+        top = scores.max()
+        return scores / top if top > 0 else scores
+
+    def recency(self, items: Sequence[ResearchItem], now: Optional[float] = None) -> np.ndarray:
+        """Exponential decay by age; items without a date get a neutral score."""
+        now = now or time.time()
+        timestamps = np.array(
+            [item.timestamp if item.timestamp is not None else np.nan for item in items], dtype=float
+        )
+        age_days = np.clip((now - timestamps) / 86400, 0, None)
+        decay = np.power(0.5, age_days / self.half_life_days)
+        return np.where(np.isnan(timestamps), RANKING_MISSING_RECENCY, decay)
+
+    def engagement(self, items: Sequence[ResearchItem]) -> np.ndarray:
+        """Log engagement relative to the best item from the same source."""
+        values = np.log1p(np.array([max(item.engagement, 0) for item in items], dtype=float))
+        sources = np.array([item.source for item in items])
+        scaled = np.zeros(len(items))
+        for source in np.unique(sources):
+            mask = sources == source
+            top = values[mask].max()
+            if top > 0:
+                scaled[mask] = values[mask] / top
+        return scaled
+
+    def score(self, query: str, items: Sequence[ResearchItem], now: Optional[float] = None) -> np.ndarray:
+        """Combined score for every item."""
+        if not items:
+            return np.zeros(0)
+        return (
+            self.weights["relevance"] * self.relevance(query, items)
+            + self.weights["recency"] * self.recency(items, now)
+            + self.weights["engagement"] * self.engagement(items)
+        )
+
+    def rank(self, query: str, items: Sequence[ResearchItem], now: Optional[float] = None) -> List[ResearchItem]:
+        """Items ordered by descending score; ties keep their original order."""
+        scores = self.score(query, items, now)
+        order = np.argsort(-scores, kind="stable")
+        return [items[index] for index in order]
+
+    def top_k(self, query: str, items: Sequence[ResearchItem], k: int, now: Optional[float] = None) -> List[ResearchItem]:
+        return self.rank(query, items, now)[:k]
+
+    def rank_sections(
+        self,
+        query: str,
+        sections: Dict[str, List[ResearchItem]],
+        k: int,
+        now: Optional[float] = None
+    ) -> Dict[str, List[ResearchItem]]:
+        """
+        Keep the top ``k`` items of every section.
+
+        All items are scored together, so BM25 document frequencies and the
+        engagement scale are shared across sections.
+        """
+        items = [item for section_items in sections.values() for item in section_items]
+        scores = self.score(query, items, now)
+        ranked = {}
+        offset = 0
+        for section, section_items in sections.items():
+            section_scores = scores[offset:offset + len(section_items)]
+            order = np.argsort(-section_scores, kind="stable")[:k]
+            ranked[section] = [section_items[index] for index in order]
+            offset += len(section_items)
+        return ranked
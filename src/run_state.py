@@ -0,0 +1,62 @@
+"""Run progress that survives Actor migrations and restarts."""
+import time
+from typing import Any, Dict, Optional
+
+from apify import Event
+
+from src.config.config import RUN_STATE_KEY
+from src.tools.cache import cache_key
+
+
+class RunState:
+    """
+    Which topics of the run are already finished, kept in the default key-value store.
+
+    The state is saved whenever the platform asks Actors to persist their
+    state and right before a migration, so a run that is migrated to another
+    host (or restarted) skips the newsletters it already pushed instead of
+    generating them again. Once a migration is announced, ``migrating`` is
+    set so no new topic is started on the host that is going away.
+    """
+    def __init__(self, actor, key: str = RUN_STATE_KEY):
+        self.actor = actor
+        self.key = key
+        self.completed: Dict[str, float] = {}
+        self.migrating = False
+
+    @staticmethod
+    def topic_id(topic: str) -> str:
+        return cache_key("topic", " ".join(topic.split()))
+
+    async def load(self) -> "RunState":
+        """Restore the state saved by an earlier attempt of this run, if any."""
+        saved = await self.actor.get_value(self.key) or {}
+        self.completed = dict(saved.get("completed") or {})
+        return self
+
+    def listen(self) -> None:
+        """Persist the state on the platform's persist-state and migrating events."""
+        self.actor.on(Event.PERSIST_STATE, self._on_persist_state)
+        self.actor.on(Event.MIGRATING, self._on_migrating)
+
+    def is_done(self, topic: str) -> bool:
+        return self.topic_id(topic) in self.completed
+
+    async def mark_done(self, topic: str) -> None:
+        """Record a finished topic and save the state right away."""
+        self.completed[self.topic_id(topic)] = time.time()
+        await self.persist()
+
+    async def persist(self) -> None:
+        await self.actor.set_value(self.key, self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"completed": self.completed}
+
+    async def _on_persist_state(self, event_data: Optional[Any] = None) -> None:
+        await self.persist()
+
+    async def _on_migrating(self, event_data: Optional[Any] = None) -> None:
+        self.migrating = True
+        self.actor.log.info(f"Run is migrating, saving state ({len(self.completed)} topic(s) done)")
+        await self.persist()
@@ -1,35 +1,494 @@
 import asyncio
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, ClassVar, Dict, List, Optional, Tuple
+
 import nest_asyncio
+from apify import Actor
+from crewai.tools import BaseTool
+from pydantic import ConfigDict, Field
+
+from src.budget import time_left
+from src.config.config import DATASET_MAX_BYTES, DATASET_MAX_ITEMS, SCRAPE_CACHE_ENABLED, TIME_BUDGET_GRACE_SECS
+from src.metrics import annotate, span
+from src.tools.batching import get_query_batcher
+from src.tools.cache import ScrapeCache, get_scrape_cache
+from src.tools.coalescing import SingleFlight, get_single_flight
+from src.tools.dataset import RUNNING_STATUSES, iter_dataset_items
+from src.tools.errors import ActorRunError, ActorStartError, ScrapeError, ScrapeTimeout
+from src.tools.records import ResearchItem
+from src.tools.resilience import LatencyTracker, get_latency_tracker, policy_for, race, retrying
 
-# Apply nest_asyncio to allow nested event loops
+# Only needed when a synchronous tool call happens on the thread that is
+# already running the Actor's event loop (see ``run_sync``).
 nest_asyncio.apply()
 
+# Event loop the Actor is running on. Captured the first time a runner is
+# created from inside a coroutine so that calls made from worker threads can
+# be scheduled back onto it instead of spinning up loops of their own.
+_actor_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def bind_event_loop(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """Remember the Actor's event loop (defaults to the running loop)."""
+    global _actor_loop
+    _actor_loop = loop or asyncio.get_running_loop()
+
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    The coroutine always runs on the Actor's event loop when one exists:
+    directly if we are on the loop's own thread, or via
+    ``run_coroutine_threadsafe`` when called from a worker thread. A temporary
+    loop is only created when no Actor loop has been seen at all.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        return loop.run_until_complete(coro)
+    if _actor_loop is not None and _actor_loop.is_running():
+        return asyncio.run_coroutine_threadsafe(coro, _actor_loop).result()
+    return asyncio.run(coro)
+
+
+def _run_timings(run, called_at: datetime) -> Dict[str, float]:
+    """Queue time and duration of a finished run, from the platform's timestamps."""
+    if isinstance(run, dict):
+        started, finished = run.get("startedAt"), run.get("finishedAt")
+    else:
+        started, finished = getattr(run, "started_at", None), getattr(run, "finished_at", None)
+    if not isinstance(started, datetime):
+        return {}
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    timings = {"queue_secs": max(0.0, (started - called_at).total_seconds())}
+    if isinstance(finished, datetime):
+        if finished.tzinfo is None:
+            finished = finished.replace(tzinfo=timezone.utc)
+        timings["run_secs"] = max(0.0, (finished - started).total_seconds())
+    return timings
+
+
+# Statuses of runs that have not finished (yet) or were stopped by a timeout
+_UNFINISHED_STATUSES = ("READY", "RUNNING", "TIMING-OUT", "TIMED-OUT")
+
+
+def _run_status(run) -> Optional[str]:
+    if isinstance(run, dict):
+        return run.get("status")
+    return getattr(run, "status", None)
+
+
+async def _current_status(run_client) -> Optional[str]:
+    try:
+        return _run_status(await run_client.get())
+    except Exception:
+        return None
+
+
+async def _abort(run_client) -> None:
+    try:
+        await run_client.abort()
+    except Exception as e:
+        print(f"Could not abort Apify run: {str(e)}")
+
 
 class RunApifyActor:
-    """Run an Apify actor and return the results."""
-    def __init__(self, actor):
+    """
+    Run an Apify actor and return the results.
+
+    Successful results are stored in the shared scrape cache, so repeating a
+    run with an equivalent input within the actor's TTL skips the Apify call.
+    Identical requests made while a run is still in flight share that run.
+    Runs follow their actor's resilience policy (see ``_call``), and failures
+    are raised as ``ScrapeError``. Reads report whether the time budget cut
+    the run short, so callers can tell a partial dataset from a complete one.
+    """
+    def __init__(
+        self,
+        actor,
+        cache: Optional[ScrapeCache] = None,
+        in_flight: Optional[SingleFlight] = None,
+        latencies: Optional[LatencyTracker] = None
+    ):
         self.actor = actor
+        if cache is None and SCRAPE_CACHE_ENABLED:
+            cache = get_scrape_cache(actor)
+        self.cache = cache
+        self.in_flight = in_flight or get_single_flight()
+        self.latencies = latencies or get_latency_tracker()
+        if _actor_loop is None:
+            try:
+                bind_event_loop()
+            except RuntimeError:
+                pass
+
+    def _run(self, actor_name, run_input, fields=None, max_items=DATASET_MAX_ITEMS, max_bytes=DATASET_MAX_BYTES):
+        return run_sync(self._run_async(actor_name, run_input, fields, max_items, max_bytes))
+
+    async def _run_async(self, actor_name, run_input, fields=None, max_items=DATASET_MAX_ITEMS, max_bytes=DATASET_MAX_BYTES):
+        """
+        Run an Apify actor and return the results.
+
+        The dataset is read page by page, keeping only ``fields`` of each item
+        and stopping at ``max_items`` items or ``max_bytes`` of serialized
+        data, whichever comes first.
+
+        Returns:
+            (dataset items, whether the run was cut short by the time budget)
+
+        Raises:
+            ScrapeError: The run failed, after any retries
+        """
+        with span("scrape", actor_name) as scrape:
+            if self.cache is not None:
+                cached = await self.cache.get(
+                    actor_name, run_input, fields=fields, max_items=max_items, max_bytes=max_bytes
+                )
+                if cached is not None:
+                    scrape.cached = True
+                    scrape.items = len(cached)
+                    return cached, False
+
+            key = self.in_flight.key(actor_name, run_input, fields, max_items, max_bytes)
+            (dataset_items, partial), scrape.coalesced = await self.in_flight.run(
+                key, lambda: self._fetch(actor_name, run_input, fields, max_items, max_bytes)
+            )
+
+            scrape.items = len(dataset_items)
+            scrape.bytes = len(json.dumps(dataset_items, ensure_ascii=False, default=str))
+            return dataset_items, partial
 
-    def _run(self, actor_name, run_input):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    async def _fetch(self, actor_name, run_input, fields, max_items, max_bytes) -> Tuple[List[Dict], bool]:
+        """Run the actor, read its dataset and cache the items."""
+        run_client, partial = await self._call(actor_name, run_input)
         try:
-            return loop.run_until_complete(self._run_async(actor_name, run_input))
+            dataset_items = [
+                item async for item in iter_dataset_items(
+                    run_client.dataset(), fields=fields, max_items=max_items, max_bytes=max_bytes
+                )
+            ]
+        except Exception as e:
+            raise ScrapeError.wrap(actor_name, e)
+        # A run cut short by the time budget must not stand in for a full one later
+        if self.cache is not None and not partial:
+            await self.cache.set(
+                actor_name, run_input, dataset_items, fields=fields, max_items=max_items, max_bytes=max_bytes
+            )
+        return dataset_items, partial
+
+    async def stream_items(
+        self,
+        actor_name,
+        run_input,
+        fields=None,
+        max_items=DATASET_MAX_ITEMS,
+        max_bytes=DATASET_MAX_BYTES,
+        on_complete: Optional[Callable[[bool], None]] = None
+    ):
+        """
+        Run an Apify actor and yield its dataset items while the run is going.
+
+        Identical streams that overlap share one run (see ``_stream_run``),
+        each reading all of its items. If every reader stops early, or a read
+        cap is hit first, the run is aborted so it stops scraping (and
+        charging). Once the stream ends, ``on_complete`` is called with
+        whether the run succeeded and every one of its items was read.
+
+        Raises:
+            ScrapeError: The run failed, after any retries
+        """
+        with span("scrape", actor_name) as scrape:
+            if self.cache is not None:
+                cached = await self.cache.get(
+                    actor_name, run_input, fields=fields, max_items=max_items, max_bytes=max_bytes
+                )
+                if cached is not None:
+                    scrape.cached = True
+                    scrape.items = len(cached)
+                    for item in cached:
+                        yield item
+                    if on_complete is not None:
+                        on_complete(True)
+                    return
+
+            key = self.in_flight.key(actor_name, run_input, fields, max_items, max_bytes)
+            flight, scrape.coalesced = self.in_flight.stream(
+                key, lambda publish: self._stream_run(
+                    actor_name, run_input, publish, fields=fields, max_items=max_items, max_bytes=max_bytes
+                )
+            )
+            reader = flight.read()
+            items = []
+            complete = False
+            try:
+                async for item in reader:
+                    items.append(item)
+                    scrape.items += 1
+                    yield item
+                complete = flight.result
+            finally:
+                await reader.aclose()
+                scrape.partial = not complete
+                if on_complete is not None:
+                    on_complete(complete)
+            scrape.bytes = len(json.dumps(items, ensure_ascii=False, default=str))
+
+    async def _stream_run(self, actor_name, run_input, publish: Callable[[Dict], None], **read_options) -> bool:
+        """
+        Start a run and ``publish`` its dataset items while it is going.
+
+        Until the first item is published, failed runs are retried under the
+        actor's ``ResiliencePolicy``; later failures end the stream, since its
+        items were already handed out. Streamed runs are not hedged. A run
+        still going when the stream stops is aborted. Items are only cached
+        when the run was read to the end.
+
+        Returns:
+            Whether the run succeeded and every one of its items was read
+        """
+        items: List[Dict] = []
+
+        async def attempt() -> bool:
+            run_client, actor_run = await self._start(actor_name, run_input, time_left())
+            read_all = False
+            try:
+                async for item in iter_dataset_items(run_client.dataset(), run_client=run_client, **read_options):
+                    items.append(item)
+                    publish(item)
+                read_all = True
+            except Exception as e:
+                error = ScrapeError.wrap(actor_name, e)
+                error.retryable = error.retryable and not items
+                raise error
+            finally:
+                status = await _current_status(run_client)
+                if status in RUNNING_STATUSES:
+                    await _abort(run_client)
+            if status != "SUCCEEDED" and not items:
+                raise ActorRunError(actor_name, status or "UNKNOWN", actor_run.id)
+            return read_all and status == "SUCCEEDED"
+
+        complete = await retrying(
+            attempt, policy_for(actor_name), on_retry=lambda retry: annotate(retries=retry)
+        )
+        if complete and self.cache is not None:
+            await self.cache.set(actor_name, run_input, items, **read_options)
+        return complete
+
+    async def _call(self, actor_name, run_input):
+        """
+        Run the actor to completion.
+
+        Failed runs are retried with jittered exponential backoff, and a run
+        still going after the actor's p95 latency is hedged with a duplicate
+        run; the first to succeed is used and the other one is aborted. Both
+        follow the actor's ``ResiliencePolicy``. Under a time budget, runs
+        are limited to the current stage's remaining time (see ``_attempt``).
+
+        Returns:
+            (run client, whether the run was cut short by the time budget)
+        """
+        policy = policy_for(actor_name)
+        hedges = 0
+
+        async def hedged_attempt():
+            nonlocal hedges
+            hedge_after = self.latencies.hedge_after(actor_name, policy)
+            result, hedged = await race(lambda: self._attempt(actor_name, run_input), hedge_after)
+            hedges += hedged
+            return result
+
+        try:
+            run_client, run, called_at, partial = await retrying(
+                hedged_attempt, policy, on_retry=lambda retry: annotate(retries=retry)
+            )
         finally:
-            # loop.close()
-            pass
+            annotate(hedges=hedges)
+        annotate(**_run_timings(run, called_at))
+        return run_client, partial
+
+    async def _attempt(self, actor_name, run_input):
+        """
+        Start one run and wait for it, aborting it when cancelled.
 
-    async def _run_async(self, actor_name, run_input):
-        """Run an Apify actor and return the results."""
+        Under a time budget the run gets the stage's remaining time as its
+        Apify timeout. A run that times out, or is still going a grace period
+        later and gets aborted, counts as a partial success: its dataset holds
+        whatever was scraped until then.
+        """
+        called_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        timeout = time_left()
+        run_client, actor_run = await self._start(actor_name, run_input, timeout)
         try:
-            actor_run = await self.actor.call(actor_name, run_input=run_input)
-            if actor_run is None:
-                raise RuntimeError('Actor task failed to start.')
-            run_client = self.actor.apify_client.run(actor_run.id)
-            await run_client.wait_for_finish()
-            dataset_client = run_client.dataset()
-            items = await dataset_client.list_items()
-            dataset_items = items.items
-            return dataset_items
+            wait_secs = None if timeout is None else math.ceil(timeout + TIME_BUDGET_GRACE_SECS)
+            run = await run_client.wait_for_finish(wait_secs=wait_secs)
+        except asyncio.CancelledError:
+            # Lost a hedged race or the caller gave up, so stop paying for the run
+            await _abort(run_client)
+            raise
         except Exception as e:
-            return f"Error running Apify actor: {str(e)}"
+            raise ScrapeError.wrap(actor_name, e)
+
+        status = _run_status(run)
+        if timeout is not None and status in _UNFINISHED_STATUSES:
+            if status != "TIMED-OUT":
+                await _abort(run_client)
+            annotate(partial=True)
+            return run_client, run or actor_run, called_at, True
+        if status is not None and status != "SUCCEEDED":
+            raise ActorRunError(actor_name, status, actor_run.id)
+        self.latencies.observe(actor_name, time.perf_counter() - start)
+        return run_client, run or actor_run, called_at, False
+
+    async def _start(self, actor_name, run_input, timeout: Optional[float]):
+        """
+        Start a run without waiting for it, limited to ``timeout`` seconds when given.
+
+        The start request is shielded from cancellation: the platform may
+        create the run anyway, so a caller that gives up while it is starting
+        (a lost hedge race, a timeout) waits for the run's id and aborts it.
+        """
+        if timeout is not None and timeout < 1:
+            raise ScrapeTimeout(actor_name, "the time budget ran out before the run started")
+        options = {} if timeout is None else {"timeout": timedelta(seconds=math.ceil(timeout))}
+        starting = asyncio.ensure_future(self.actor.start(actor_name, run_input=run_input, **options))
+        try:
+            actor_run = await asyncio.shield(starting)
+        except asyncio.CancelledError:
+            try:
+                actor_run = await starting
+            except Exception:
+                actor_run = None
+            if actor_run is not None:
+                await _abort(self.actor.apify_client.run(actor_run.id))
+            raise
+        except Exception as e:
+            raise ActorStartError.wrap(actor_name, e)
+        if actor_run is None:
+            raise ActorStartError(actor_name, "Actor task failed to start.")
+        return self.actor.apify_client.run(actor_run.id), actor_run
+
+
+class ApifyScraperTool(BaseTool):
+    """
+    Base class for tools backed by a single Apify actor.
+
+    Subclasses set ``actor_id`` and implement ``_build_run_input`` with the
+    tool's parameters and ``normalize_item`` to turn a dataset item into a
+    ``ResearchItem``. ``fetch`` returns the records themselves, while ``_run``
+    and ``_arun`` hand the agent their compact dict form. Tools that set
+    ``batch_query_field`` share runs with concurrent searches of the same
+    actor (see ``QueryBatcher``).
+    """
+    actor_id: ClassVar[str] = ""
+    # Dataset fields the tool needs; everything else is dropped on read
+    dataset_fields: ClassVar[Optional[List[str]]] = None
+    # Run input field whose queries can be merged with other callers' into one run
+    batch_query_field: ClassVar[Optional[str]] = None
+    actor: Actor = Field(description="Apify Actor instance")
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _build_run_input(self, *args, **kwargs) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        raise NotImplementedError
+
+    @staticmethod
+    def batch_query_of(item: Dict) -> Optional[str]:
+        """The query a dataset item was scraped for, used to split shared runs."""
+        return None
+
+    @classmethod
+    def normalize(cls, items: List[Dict]) -> List[ResearchItem]:
+        """Normalize dataset items, dropping the ones without a URL."""
+        records = []
+        for item in items:
+            record = cls.normalize_item(item)
+            if record is not None and record.url:
+                records.append(record)
+        return records
+
+    def narrow_since(self, kwargs: Dict[str, Any], since: float) -> Dict[str, Any]:
+        """
+        Restrict tool arguments to items published after ``since``.
+
+        Used for incremental scraping; tools whose actor has no date filter
+        return the arguments unchanged and rely on de-duplication instead.
+        """
+        return kwargs
+
+    async def fetch(self, *args, **kwargs) -> List[ResearchItem]:
+        """
+        Run the actor and return normalized records.
+
+        Raises:
+            ScrapeError: The run failed, after any retries
+        """
+        records, _ = await self.scrape(*args, **kwargs)
+        return records
+
+    async def scrape(self, *args, **kwargs) -> Tuple[List[ResearchItem], bool]:
+        """
+        Run the actor and return normalized records, as ``fetch``.
+
+        Returns:
+            (records, whether the run was read completely rather than cut
+            short by the time budget)
+        """
+        run_actor = RunApifyActor(self.actor)
+        run_input = self._build_run_input(*args, **kwargs)
+        if self.batch_query_field:
+            items, partial = await get_query_batcher().run(
+                run_actor, self.actor_id, run_input, self.batch_query_field, self.batch_query_of,
+                fields=self.dataset_fields
+            )
+        else:
+            items, partial = await run_actor._run_async(self.actor_id, run_input, fields=self.dataset_fields)
+        return self.normalize(items), not partial
+
+    async def stream(
+        self,
+        *args,
+        on_complete: Optional[Callable[[bool], None]] = None,
+        **kwargs
+    ) -> AsyncIterator[ResearchItem]:
+        """
+        Run the actor and yield normalized records as the run produces them.
+
+        Closing the stream early aborts the run, and ``on_complete`` learns
+        whether every item of a successful run was read (see
+        ``RunApifyActor.stream_items``).
+        """
+        run_input = self._build_run_input(*args, **kwargs)
+        items = RunApifyActor(self.actor).stream_items(
+            self.actor_id, run_input, fields=self.dataset_fields, on_complete=on_complete
+        )
+        try:
+            async for item in items:
+                record = self.normalize_item(item)
+                if record is not None and record.url:
+                    yield record
+        finally:
+            await items.aclose()
+
+    def _run(self, *args, **kwargs):
+        return run_sync(self._arun(*args, **kwargs))
+
+    async def _arun(self, *args, **kwargs):
+        # Agents get the failure as text so they can carry on with other sources
+        try:
+            records = await self.fetch(*args, **kwargs)
+        except ScrapeError as e:
+            return str(e)
+        return [record.to_dict() for record in records]
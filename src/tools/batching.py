@@ -0,0 +1,231 @@
+"""Micro-batching of search queries into shared Apify runs."""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.config.config import QUERY_BATCH_MAX_QUERIES, QUERY_BATCH_WINDOW_SECS
+from src.tools.cache import cache_key, normalize_run_input
+from src.tools.errors import ScrapeError
+
+
+def split_queries(value: Union[str, List[str], None]) -> List[str]:
+    """Queries of a run input field, given as a list or one query per line."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    return [query.strip() for query in value if query and query.strip()]
+
+
+def join_queries(like: Union[str, List[str]], queries: List[str]) -> Union[str, List[str]]:
+    """Queries in the same form (newline-separated string or list) as ``like``."""
+    return "\n".join(queries) if isinstance(like, str) else list(queries)
+
+
+def _normalized(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class _Request:
+    run_input: Dict[str, Any]
+    queries: List[str]
+    future: asyncio.Future
+
+
+@dataclass
+class _Batch:
+    actor_name: str
+    query_field: str
+    template: Dict[str, Any]
+    query_of: Callable[[Dict], Optional[str]]
+    requests: List[_Request] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def queries(self) -> List[str]:
+        merged = {}
+        for request in self.requests:
+            for query in request.queries:
+                merged.setdefault(_normalized(query), query)
+        return list(merged.values())
+
+
+class QueryBatcher:
+    """
+    Merges concurrent searches against the same actor into one run.
+
+    Requests whose run inputs only differ in their query field are collected
+    for ``window_secs`` (or until ``max_queries`` distinct queries are
+    waiting) and submitted as a single run with all their queries. The
+    returned items are split back to each caller by the query they were
+    scraped for; items that cannot be attributed go to every caller. When the
+    shared run fails, every caller gets its ``ScrapeError``. Callers that are
+    cancelled leave the run to the others, but once every caller is gone the
+    run itself is cancelled, which aborts it.
+    """
+    def __init__(self, window_secs: float = QUERY_BATCH_WINDOW_SECS, max_queries: int = QUERY_BATCH_MAX_QUERIES):
+        self.window_secs = window_secs
+        self.max_queries = max_queries
+        self.runs = 0
+        self.requests = 0
+        self._batches: Dict[str, _Batch] = {}
+
+    async def run(
+        self,
+        run_actor,
+        actor_name: str,
+        run_input: Dict[str, Any],
+        query_field: str,
+        query_of: Callable[[Dict], Optional[str]],
+        **run_kwargs
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Run a search as part of a shared run.
+
+        Args:
+            run_actor: ``RunApifyActor`` used for the shared run
+            actor_name: Actor ID
+            run_input: This caller's run input
+            query_field: Run input field holding the queries
+            query_of: Returns the query a dataset item was scraped for
+            **run_kwargs: Passed on to ``RunApifyActor._run_async``
+
+        Returns:
+            (this caller's dataset items, whether the time budget cut the
+            shared run short)
+
+        Raises:
+            ScrapeError: The shared run failed
+        """
+        queries = split_queries(run_input.get(query_field))
+        if self.window_secs <= 0 or not queries:
+            return await run_actor._run_async(actor_name, run_input, **run_kwargs)
+
+        if run_actor.cache is not None:
+            cached = await run_actor.cache.get(actor_name, run_input, **run_kwargs)
+            if cached is not None:
+                return cached, False
+
+        loop = asyncio.get_running_loop()
+        template = {key: value for key, value in run_input.items() if key != query_field}
+        key = cache_key(id(loop), actor_name, query_field, normalize_run_input(template))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(actor_name, query_field, template, query_of)
+            self._batches[key] = batch
+            batch.timer = loop.call_later(self.window_secs, self._flush, key, run_actor, run_kwargs)
+
+        request = _Request(run_input, queries, loop.create_future())
+        batch.requests.append(request)
+        self.requests += 1
+        if len(batch.queries) >= self.max_queries:
+            batch.timer.cancel()
+            self._flush(key, run_actor, run_kwargs)
+
+        try:
+            items, partial = await request.future
+        except asyncio.CancelledError:
+            self._abandon(key, batch)
+            raise
+        # A shared run cut short by the time budget must not stand in for a full one later
+        if run_actor.cache is not None and not partial:
+            await run_actor.cache.set(actor_name, run_input, items, **run_kwargs)
+        return items, partial
+
+    def _flush(self, key: str, run_actor, run_kwargs: Dict[str, Any]) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is not None:
+            self.runs += 1
+            batch.task = asyncio.ensure_future(self._run_batch(batch, run_actor, run_kwargs))
+
+    def _abandon(self, key: str, batch: _Batch) -> None:
+        """Drop a batch, or cancel its run, once none of its callers is waiting any more."""
+        if not all(request.future.done() for request in batch.requests):
+            return
+        if batch.task is not None:
+            batch.task.cancel()
+        elif self._batches.get(key) is batch:
+            batch.timer.cancel()
+            del self._batches[key]
+
+    async def _run_batch(self, batch: _Batch, run_actor, run_kwargs: Dict[str, Any]) -> None:
+        """Run a batch and settle every caller's future, whatever goes wrong."""
+        try:
+            if len(batch.requests) == 1:
+                request = batch.requests[0]
+                results = [await self._run_single(run_actor, batch.actor_name, request.run_input, run_kwargs)]
+            else:
+                results = await self._run_shared(batch, run_actor, run_kwargs)
+            for request, result in zip(batch.requests, results):
+                if request.future.done():
+                    continue
+                if isinstance(result, ScrapeError):
+                    request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+        except BaseException as e:
+            # E.g. splitting the shared dataset failed; no caller may be left waiting
+            for request in batch.requests:
+                if request.future.done():
+                    continue
+                if isinstance(e, Exception):
+                    request.future.set_exception(ScrapeError.wrap(batch.actor_name, e))
+                else:
+                    request.future.cancel()
+            if not isinstance(e, Exception):
+                raise
+
+    @staticmethod
+    async def _run_single(run_actor, actor_name: str, run_input: Dict[str, Any], run_kwargs: Dict[str, Any]):
+        try:
+            return await run_actor._run_async(actor_name, run_input, **run_kwargs)
+        except Exception as e:
+            return ScrapeError.wrap(actor_name, e)
+
+    async def _run_shared(
+        self,
+        batch: _Batch,
+        run_actor,
+        run_kwargs: Dict[str, Any]
+    ) -> List[Union[Tuple[List[Dict], bool], ScrapeError]]:
+        first = batch.requests[0].run_input[batch.query_field]
+        run_input = dict(batch.template, **{batch.query_field: join_queries(first, batch.queries)})
+        # The shared run returns the items of every caller, so it may read that many more
+        run_kwargs = dict(run_kwargs)
+        for limit in ("max_items", "max_bytes"):
+            if run_kwargs.get(limit) is not None:
+                run_kwargs[limit] *= len(batch.requests)
+
+        result = await self._run_single(run_actor, batch.actor_name, run_input, run_kwargs)
+        if isinstance(result, ScrapeError):
+            return [result] * len(batch.requests)
+        items, partial = result
+
+        submitted = {_normalized(query) for query in batch.queries}
+        attributed = []
+        for item in items:
+            query = batch.query_of(item)
+            query = _normalized(query) if isinstance(query, str) else None
+            attributed.append((query if query in submitted else None, item))
+
+        results = []
+        for request in batch.requests:
+            wanted = {_normalized(query) for query in request.queries}
+            results.append(([item for query, item in attributed if query is None or query in wanted], partial))
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "runs": self.runs}
+
+
+_query_batcher: Optional[QueryBatcher] = None
+
+
+def get_query_batcher() -> QueryBatcher:
+    """Return the process-wide query batcher, shared by every topic of a run."""
+    global _query_batcher
+    if _query_batcher is None:
+        _query_batcher = QueryBatcher()
+    return _query_batcher
@@ -0,0 +1,313 @@
+"""Content-addressed cache for Apify scrape results."""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.config.config import (
+    DATASET_MAX_BYTES,
+    DATASET_MAX_ITEMS,
+    SCRAPE_CACHE_BACKEND,
+    SCRAPE_CACHE_DEFAULT_TTL,
+    SCRAPE_CACHE_DIR,
+    SCRAPE_CACHE_MAX_ENTRIES,
+    SCRAPE_CACHE_STORE,
+    SCRAPE_CACHE_TTLS,
+)
+
+
+def normalize_run_input(value: Any) -> Any:
+    """
+    Canonicalize a run input so equivalent inputs hash the same.
+
+    Unset values (None) are dropped and surrounding whitespace is stripped from
+    strings. Key order does not matter since keys are sorted when hashing.
+    """
+    if isinstance(value, dict):
+        return {
+            key: normalize_run_input(item)
+            for key, item in value.items()
+            if item is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [normalize_run_input(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def cache_key(*parts: Any) -> str:
+    """Return a stable SHA-256 hex digest of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """In-process LRU tier holding at most ``max_entries`` entries."""
+    def __init__(self, max_entries: int = SCRAPE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Dict) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DirectoryTier:
+    """
+    Persistent tier storing one JSON file per entry in a local directory.
+
+    File I/O runs in a worker thread so it does not block the event loop
+    that every concurrent scrape shares.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, entry: Dict) -> None:
+        await asyncio.to_thread(self._write, key, entry)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._remove, key)
+
+    def _read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: Dict) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        # A temporary file of its own, since writes of the same key may overlap
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.path)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self._file(key))
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+
+class KeyValueStoreTier:
+    """Persistent tier backed by a named Apify key-value store."""
+    def __init__(self, actor, store_name: str):
+        self.actor = actor
+        self.store_name = store_name
+        self._store = None
+
+    async def _open(self):
+        if self._store is None:
+            self._store = await self.actor.open_key_value_store(name=self.store_name)
+        return self._store
+
+    async def get(self, key: str) -> Optional[Dict]:
+        store = await self._open()
+        return await store.get_value(key)
+
+    async def set(self, key: str, entry: Dict) -> None:
+        store = await self._open()
+        await store.set_value(key, entry)
+
+    async def delete(self, key: str) -> None:
+        store = await self._open()
+        await store.set_value(key, None)
+
+
+class BoundedTier:
+    """
+    Wraps a persistent tier so it holds at most ``max_entries`` entries.
+
+    The keys and write times of the entries are kept in an index entry of
+    the tier itself, so the bound carries over to later runs. Writing past
+    the bound evicts the least recently written entries. Runs that write the
+    same store at the same time may each miss the other's keys, so the bound
+    is best effort there.
+    """
+    index_key = "memo-index"
+
+    def __init__(self, tier, max_entries: int):
+        self.tier = tier
+        self.max_entries = max_entries
+        self._index: Optional[Dict[str, float]] = None
+
+    async def _load_index(self) -> Dict[str, float]:
+        if self._index is None:
+            try:
+                saved = await self.tier.get(self.index_key)
+            except Exception:
+                saved = None
+            if self._index is None:
+                self._index = dict((saved or {}).get("keys") or {})
+        return self._index
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await self.tier.get(key)
+
+    async def set(self, key: str, entry: Dict) -> None:
+        index = await self._load_index()
+        await self.tier.set(key, entry)
+        index[key] = time.time()
+        evicted = sorted(index, key=index.get)[:max(0, len(index) - self.max_entries)]
+        for old_key in evicted:
+            del index[old_key]
+        await self.tier.set(self.index_key, {"keys": dict(index)})
+        for old_key in evicted:
+            await self.tier.delete(old_key)
+
+    async def delete(self, key: str) -> None:
+        index = await self._load_index()
+        await self.tier.delete(key)
+        if index.pop(key, None) is not None:
+            await self.tier.set(self.index_key, {"keys": dict(index)})
+
+
+async def read_persistent(tier, key: str) -> Optional[Dict]:
+    """
+    Read an entry from a persistent tier, or None when it fails.
+
+    Persistent tiers are best effort: a failed read is a miss, and a failed
+    write (see ``write_persistent``) leaves the entry in memory only.
+    """
+    try:
+        return await tier.get(key)
+    except Exception:
+        return None
+
+
+async def write_persistent(tier, key: str, entry: Dict) -> None:
+    """Write an entry to a persistent tier, ignoring failures (see ``read_persistent``)."""
+    try:
+        await tier.set(key, entry)
+    except Exception:
+        pass
+
+
+def persistent_tier(actor, backend: str, store_name: str, directory: str, max_entries: Optional[int] = None):
+    """
+    Persistent tier for a backend setting: "kvs" for the named Actor
+    key-value store ``store_name``, "dir" for ``directory``, or None for
+    "memory" (no persistent tier). With ``max_entries``, the tier is bounded
+    by a ``BoundedTier``.
+    """
+    if backend == "kvs":
+        tier = KeyValueStoreTier(actor, store_name)
+    elif backend == "dir":
+        tier = DirectoryTier(directory)
+    else:
+        return None
+    return tier if max_entries is None else BoundedTier(tier, max_entries)
+
+
+class ScrapeCache:
+    """
+    Two-tier cache for dataset items keyed by ``(actor_name, run_input)``
+    and the options the dataset was read with.
+
+    A read keeps only some fields of each item and stops at an item and a
+    byte cap, so the same run read with other options yields other items;
+    the options are part of the key. Entries expire after the TTL configured
+    for the actor. Lookups try the in-memory LRU tier first and fall back to
+    the optional persistent tier, promoting persistent hits back into memory.
+    """
+    def __init__(
+        self,
+        persistent=None,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = SCRAPE_CACHE_DEFAULT_TTL,
+        max_entries: int = SCRAPE_CACHE_MAX_ENTRIES
+    ):
+        self.memory = MemoryTier(max_entries)
+        self.persistent = persistent
+        self.ttls = SCRAPE_CACHE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        actor_name: str,
+        run_input: Dict,
+        fields: Optional[List[str]] = None,
+        max_items: Optional[int] = DATASET_MAX_ITEMS,
+        max_bytes: Optional[int] = DATASET_MAX_BYTES
+    ) -> str:
+        return cache_key(actor_name, normalize_run_input(run_input), sorted(fields or []), max_items, max_bytes)
+
+    def ttl(self, actor_name: str) -> float:
+        return self.ttls.get(actor_name, self.default_ttl)
+
+    def _fresh(self, entry: Optional[Dict], actor_name: str) -> bool:
+        return bool(entry) and time.time() - entry["stored_at"] < self.ttl(actor_name)
+
+    async def get(self, actor_name: str, run_input: Dict, **read_options) -> Optional[List[Dict]]:
+        """Return cached items for this run and ``read_options`` (see ``key``), or None on a miss."""
+        key = self.key(actor_name, run_input, **read_options)
+        entry = self.memory.get(key)
+        if not self._fresh(entry, actor_name):
+            self.memory.delete(key)
+            entry = None
+            if self.persistent is not None:
+                entry = await read_persistent(self.persistent, key)
+                if self._fresh(entry, actor_name):
+                    self.memory.set(key, entry)
+                else:
+                    entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["items"]
+
+    async def set(self, actor_name: str, run_input: Dict, items: List[Dict], **read_options) -> None:
+        """Store the dataset items produced by this run, as read with ``read_options``."""
+        key = self.key(actor_name, run_input, **read_options)
+        entry = {"actor": actor_name, "stored_at": time.time(), "items": items}
+        self.memory.set(key, entry)
+        if self.persistent is not None:
+            await write_persistent(self.persistent, key, entry)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.memory)}
+
+
+_scrape_cache: Optional[ScrapeCache] = None
+
+
+def get_scrape_cache(actor) -> ScrapeCache:
+    """
+    Return the process-wide scrape cache, creating it on first use, with
+    the persistent tier chosen by SCRAPE_CACHE_BACKEND.
+    """
+    global _scrape_cache
+    if _scrape_cache is None:
+        persistent = persistent_tier(actor, SCRAPE_CACHE_BACKEND, SCRAPE_CACHE_STORE, SCRAPE_CACHE_DIR)
+        _scrape_cache = ScrapeCache(persistent=persistent)
+    return _scrape_cache
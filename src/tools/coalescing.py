@@ -0,0 +1,170 @@
+"""Single-flight coalescing of identical in-flight scrapes."""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.tools.cache import cache_key, normalize_run_input
+
+
+class SharedStream:
+    """
+    One in-flight stream of items, replayed to every reader.
+
+    ``produce`` is started as a task of its own and called with a
+    ``publish`` callback for each item; what it returns becomes ``result``.
+    Readers get every item published so far and then the rest as they
+    arrive. Once the last reader stops, the task is cancelled, so producers
+    should clean up (e.g. abort their run) on cancellation.
+    """
+    def __init__(self, produce: Callable[[Callable[[Any], None]], Awaitable[Any]]):
+        self.items: List[Any] = []
+        self.readers = 0
+        self.closing = False
+        self._loop = asyncio.get_running_loop()
+        self._published = self._loop.create_future()
+        self.task = asyncio.ensure_future(produce(self._publish))
+        self.task.add_done_callback(self._done)
+
+    @property
+    def result(self) -> Any:
+        return self.task.result()
+
+    def _publish(self, item: Any) -> None:
+        self.items.append(item)
+        self._wake()
+
+    def _wake(self) -> None:
+        published, self._published = self._published, self._loop.create_future()
+        published.set_result(None)
+
+    def _done(self, task: asyncio.Future) -> None:
+        self._wake()
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every reader stopped
+            task.exception()
+
+    async def read(self) -> AsyncIterator[Any]:
+        """Yield the stream's items, then raise the producer's error if it failed."""
+        self.readers += 1
+        try:
+            index = 0
+            while True:
+                if index < len(self.items):
+                    index += 1
+                    yield self.items[index - 1]
+                elif self.task.done():
+                    self.task.result()
+                    return
+                else:
+                    await asyncio.wait([self._published])
+        finally:
+            self.readers -= 1
+            if not self.readers and not self.task.done():
+                self.closing = True
+                self.task.cancel()
+                await asyncio.wait([self.task])
+
+
+class SingleFlight:
+    """
+    Lets concurrent identical requests share one in-flight call.
+
+    The first request for a key (the leader) starts the call as a task of
+    its own; requests for the same key that arrive before it finishes await
+    that task instead of starting another. Results and exceptions are shared,
+    and the key is forgotten as soon as the call finishes, so later requests
+    start fresh (the scrape cache covers reuse after that). A waiter that is
+    cancelled does not cancel the call for the others, but once every waiter
+    is gone the call itself is cancelled. Streams are shared the same way
+    (see ``stream``).
+    """
+    def __init__(self):
+        self.leaders = 0
+        self.joined = 0
+        self._in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._streams: Dict[Tuple[int, str], SharedStream] = {}
+
+    @staticmethod
+    def key(actor_name: str, run_input: Dict, *read_options: Any) -> str:
+        return cache_key("single-flight", actor_name, normalize_run_input(run_input), *read_options)
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await the in-flight call for ``key``, starting it if there is none.
+
+        Returns:
+            (result, whether the result was shared with an earlier request)
+        """
+        loop = asyncio.get_running_loop()
+        # Futures belong to one loop, so flights are tracked per loop
+        flight_key = (id(loop), key)
+        future = self._in_flight.get(flight_key)
+        shared = future is not None
+        if shared:
+            self.joined += 1
+        else:
+            self.leaders += 1
+            future = asyncio.ensure_future(call())
+            self._in_flight[flight_key] = future
+            future.add_done_callback(lambda done: self._finish(flight_key, done))
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future), shared
+        except asyncio.CancelledError:
+            if self._waiters.get(future) == 1:
+                future.cancel()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters[future] -= 1
+
+    def stream(
+        self,
+        key: str,
+        produce: Callable[[Callable[[Any], None]], Awaitable[Any]]
+    ) -> Tuple[SharedStream, bool]:
+        """
+        Join the in-flight stream for ``key``, starting ``produce`` if there is none.
+
+        Read the stream with ``SharedStream.read`` right away, and close that
+        reader when done with it; the stream ends once it has no readers.
+
+        Returns:
+            (the stream, whether it was shared with an earlier request)
+        """
+        flight_key = (id(asyncio.get_running_loop()), key)
+        flight = self._streams.get(flight_key)
+        shared = flight is not None and not flight.closing
+        if shared:
+            self.joined += 1
+        else:
+            self.leaders += 1
+            flight = SharedStream(produce)
+            self._streams[flight_key] = flight
+            flight.task.add_done_callback(lambda done: self._end_stream(flight_key, flight))
+        return flight, shared
+
+    def _end_stream(self, flight_key: Tuple[int, str], flight: SharedStream) -> None:
+        if self._streams.get(flight_key) is flight:
+            del self._streams[flight_key]
+
+    def _finish(self, flight_key: Tuple[int, str], future: asyncio.Future) -> None:
+        self._in_flight.pop(flight_key, None)
+        self._waiters.pop(future, None)
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every waiter was cancelled
+            future.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"runs": self.leaders, "coalesced": self.joined, "in_flight": len(self._in_flight) + len(self._streams)}
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group shared by every scraper tool."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,91 @@
+"""Paginated, projected reads of Apify datasets."""
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.config.config import DATASET_PAGE_SIZE, SCRAPE_STREAM_POLL_MAX_SECS, SCRAPE_STREAM_POLL_MIN_SECS
+
+# Statuses of runs that may still add items to their dataset
+RUNNING_STATUSES = ("READY", "RUNNING", "TIMING-OUT", "ABORTING")
+
+
+def project_item(item: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested top-level fields of a dataset item."""
+    if not fields:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+async def iter_dataset_items(
+    dataset_client,
+    page_size: int = DATASET_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+    max_items: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    run_client=None,
+    min_poll_secs: float = SCRAPE_STREAM_POLL_MIN_SECS,
+    max_poll_secs: float = SCRAPE_STREAM_POLL_MAX_SECS
+) -> AsyncIterator[Dict]:
+    """
+    Yield dataset items one page at a time.
+
+    With ``run_client``, the dataset is read while the run is still going:
+    once the items pushed so far are read, the run's status is checked and
+    the dataset polled again until the run has finished and its last items
+    are read. Polls start ``min_poll_secs`` apart and back off exponentially
+    to ``max_poll_secs`` while they find no new items.
+
+    Args:
+        dataset_client: Apify dataset client of the run
+        page_size: Number of items requested per page
+        fields: Top-level fields to keep; the rest are dropped server side and
+            again client side in case the API ignores the projection
+        max_items: Stop after this many items
+        max_bytes: Stop before the serialized items would exceed this size
+        run_client: Apify run client of a run that may still be going
+        min_poll_secs: Seconds before the first poll once caught up
+        max_poll_secs: Longest wait between polls
+
+    Yields:
+        Projected dataset items in dataset order
+    """
+    offset = 0
+    count = 0
+    size = 0
+    running = run_client is not None
+    poll_secs = min_poll_secs
+    while True:
+        limit = page_size if max_items is None else min(page_size, max_items - count)
+        if limit <= 0:
+            return
+
+        page = await dataset_client.list_items(offset=offset, limit=limit, fields=fields)
+        items = page.items
+        for item in items:
+            item = project_item(item, fields)
+            if max_bytes is not None:
+                item_size = len(json.dumps(item, ensure_ascii=False, default=str))
+                if size + item_size > max_bytes:
+                    return
+                size += item_size
+            count += 1
+            yield item
+
+        offset += len(items)
+        if len(items) < limit:
+            if not running:
+                return
+            # Read once more after the run finished, for items pushed meanwhile
+            running = await _is_running(run_client)
+            if running:
+                if items:
+                    # The run is still producing, so check back soon
+                    poll_secs = min_poll_secs
+                await asyncio.sleep(poll_secs)
+                poll_secs = min(poll_secs * 2, max_poll_secs)
+
+
+async def _is_running(run_client) -> bool:
+    run = await run_client.get()
+    status = run.get("status") if isinstance(run, dict) else getattr(run, "status", None)
+    return status in RUNNING_STATUSES
@@ -0,0 +1,58 @@
+"""Typed failures of Apify scrapes."""
+from typing import Optional
+
+
+class ScrapeError(Exception):
+    """
+    An Apify actor run that did not produce a dataset.
+
+    Attributes:
+        actor_name: Actor ID of the failed run
+        retryable: Whether running the actor again may succeed
+    """
+    retryable = True
+
+    def __init__(self, actor_name: str, message: str):
+        super().__init__(f"Error running Apify actor {actor_name}: {message}")
+        self.actor_name = actor_name
+
+    @classmethod
+    def wrap(cls, actor_name: str, error: Exception) -> "ScrapeError":
+        """
+        A ``ScrapeError`` for an exception raised by the Apify client.
+
+        Client errors other than rate limiting (HTTP 4xx, e.g. an invalid
+        input or an exhausted budget) are not retryable.
+        """
+        if isinstance(error, ScrapeError):
+            return error
+        wrapped = cls(actor_name, str(error))
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int) and 400 <= status < 500 and status != 429:
+            wrapped.retryable = False
+        wrapped.__cause__ = error
+        return wrapped
+
+
+class ActorStartError(ScrapeError):
+    """The platform did not start the run."""
+
+
+class ActorRunError(ScrapeError):
+    """
+    The run finished without succeeding.
+
+    Attributes:
+        status: Final run status, e.g. "FAILED", "ABORTED" or "TIMED-OUT"
+        run_id: ID of the run, when known
+    """
+    def __init__(self, actor_name: str, status: str, run_id: Optional[str] = None):
+        run = f"run {run_id}" if run_id else "run"
+        super().__init__(actor_name, f"{run} finished with status {status}")
+        self.status = status
+        self.run_id = run_id
+
+
+class ScrapeTimeout(ScrapeError):
+    """The time budget ran out before a run could start."""
+    retryable = False
@@ -1,8 +1,7 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Literal
-from apify import Actor
-from src.tools.base import RunApifyActor
+from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Dict, List, Optional, Literal
+from src.tools.base import ApifyScraperTool
+from src.tools.records import ResearchItem, canonical_url, clean_text, parse_timestamp
 
 class GoogleNewsScraperInput(BaseModel):
     """Input schema for GoogleNewsScraper tool."""
@@ -16,19 +15,41 @@ class GoogleNewsScraperInput(BaseModel):
         default=20
     )
 
-class GoogleNewsScraperTool(BaseTool):
+class GoogleNewsScraperTool(ApifyScraperTool):
     name: str = "Google News Scraper"
     description: str = "Tool for scraping Google News articles with configurable parameters"
     args_schema: type[BaseModel] = GoogleNewsScraperInput
-    actor: Actor = Field(description="Apify Actor instance")
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    actor_id: ClassVar[str] = "aymorato/super-fast-google-news-scraper-pay-per-result"
+    dataset_fields: ClassVar[Optional[List[str]]] = [
+        "title", "link", "url", "source", "publishedAt", "date", "description",
+        "snippet", "keyword"
+    ]
+    batch_query_field: ClassVar[Optional[str]] = "keywords"
 
-    def _run(
+    @staticmethod
+    def batch_query_of(item: Dict) -> Optional[str]:
+        return item.get("keyword")
+
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        publisher = item.get("source")
+        if isinstance(publisher, dict):
+            publisher = publisher.get("name") or publisher.get("title")
+        return ResearchItem(
+            url=canonical_url(item.get("url") or item.get("link")),
+            title=clean_text(item.get("title")),
+            snippet=clean_text(item.get("description") or item.get("snippet")),
+            author=clean_text(publisher),
+            source="google_news",
+            timestamp=parse_timestamp(item.get("publishedAt") or item.get("date"))
+        )
+
+    def _build_run_input(
         self,
         keywords: List[str],
         language: Optional[str] = "US:en",
         maxItems: Optional[int] = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         run_inputs = {
             "keywords": keywords,
             "language": language
@@ -45,6 +66,4 @@ class GoogleNewsScraperTool(BaseTool):
         }
         run_inputs["proxy"] = proxy
         
-        run_actor = RunApifyActor(self.actor)
-        dataset = run_actor._run("aymorato/super-fast-google-news-scraper-pay-per-result", run_inputs)
-        return dataset
\ No newline at end of file
+        return run_inputs
\ No newline at end of file
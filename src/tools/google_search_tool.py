@@ -1,8 +1,7 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
-from apify import Actor
-from src.tools.base import RunApifyActor
+from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Dict, List, Optional
+from src.tools.base import ApifyScraperTool
+from src.tools.records import ResearchItem, canonical_url, clean_text, parse_timestamp, utc_date
 
 class GoogleScraperInput(BaseModel):
     """Input schema for GoogleScraper tool."""
@@ -80,13 +79,42 @@ class GoogleScraperInput(BaseModel):
         description="Include lower quality results normally filtered by Google"
     )
 
-class GoogleScraperTool(BaseTool):
+class GoogleScraperTool(ApifyScraperTool):
     name: str = "Google Scraper"
     description: str = "Tool for scraping Google search results with configurable parameters"
     args_schema: type[BaseModel] = GoogleScraperInput
-    actor: Actor = Field(description="Apify Actor instance")
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-    def _run(
+    actor_id: ClassVar[str] = "apify/google-search-scraper"
+    dataset_fields: ClassVar[Optional[List[str]]] = ["searchQuery", "organicResults"]
+    batch_query_field: ClassVar[Optional[str]] = "queries"
+
+    @staticmethod
+    def batch_query_of(item: Dict) -> Optional[str]:
+        search_query = item.get("searchQuery")
+        return search_query.get("term") if isinstance(search_query, dict) else None
+
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        return ResearchItem(
+            url=canonical_url(item.get("url")),
+            title=clean_text(item.get("title")),
+            snippet=clean_text(item.get("description")),
+            author=clean_text(item.get("displayedUrl")),
+            source="google",
+            timestamp=parse_timestamp(item.get("date"))
+        )
+
+    @classmethod
+    def normalize(cls, items: List[Dict]) -> List[ResearchItem]:
+        # Each dataset item is a results page; the records are its organic results
+        results = [result for page in items for result in page.get("organicResults") or []]
+        return super().normalize(results)
+
+    def narrow_since(self, kwargs: Dict[str, Any], since: float) -> Dict[str, Any]:
+        kwargs = dict(kwargs, afterDate=utc_date(since))
+        kwargs.pop("quickDateRange", None)
+        return kwargs
+
+    def _build_run_input(
         self,
         queries: List[str],
         resultsPerPage: Optional[int] = 10,
@@ -103,7 +131,7 @@ class GoogleScraperTool(BaseTool):
         fileTypes: Optional[List[str]] = [],
         mobileResults: Optional[bool] = False,
         includeUnfilteredResults: Optional[bool] = False
-    ) -> str:
+    ) -> Dict[str, Any]:
         run_inputs = {
             "queries": "\n".join(queries)
         }
@@ -138,6 +166,4 @@ class GoogleScraperTool(BaseTool):
         if includeUnfilteredResults:
             run_inputs["includeUnfilteredResults"] = includeUnfilteredResults
             
-        run_actor = RunApifyActor(self.actor)
-        dataset = run_actor._run("apify/google-search-scraper", run_inputs)
-        return dataset
+        return run_inputs
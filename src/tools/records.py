@@ -0,0 +1,129 @@
+"""Compact normalized record shared by all scraper tools."""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Longest snippet kept per item; scraped bodies beyond this are noise for the writer
+SNIPPET_MAX_CHARS = 500
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref_src"}
+_TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+
+@dataclass(slots=True)
+class ResearchItem:
+    """
+    One scraped item, reduced to the fields the newsletter uses.
+
+    Attributes:
+        url: Canonical URL of the item
+        title: Headline or video/post title
+        snippet: Short description or body text
+        author: Publisher, channel, user or handle
+        source: Scraper the item came from (e.g. "reddit")
+        engagement: Source-specific interaction count (votes, likes, views)
+        timestamp: Publication time as a Unix epoch, when known
+        alternates: URLs of near-duplicate items covering the same story
+    """
+    url: str
+    title: str = ""
+    snippet: str = ""
+    author: str = ""
+    source: str = ""
+    engagement: int = 0
+    timestamp: Optional[float] = None
+    alternates: List[str] = field(default_factory=list)
+
+    @property
+    def date(self) -> str:
+        """Publication date formatted for display, or an empty string."""
+        if self.timestamp is None:
+            return ""
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc).strftime("%B %d, %Y")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record as a dict without empty fields."""
+        data = {"url": self.url, "title": self.title, "snippet": self.snippet,
+                "author": self.author, "source": self.source, "date": self.date}
+        if self.engagement:
+            data["engagement"] = self.engagement
+        if self.alternates:
+            data["alternates"] = list(self.alternates)
+        return {key: value for key, value in data.items() if value}
+
+
+def canonical_url(url: Optional[str]) -> str:
+    """Normalize a URL so the same page always compares equal."""
+    if not url or not isinstance(url, str):
+        return ""
+    parts = urlsplit(url.strip())
+    if not parts.scheme or not parts.netloc:
+        return url.strip()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), host, path, query, ""))
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    Parse the date formats returned by the scrapers into a Unix epoch.
+
+    Handles epoch seconds/milliseconds, ISO 8601 strings (including a trailing
+    ``Z``), plain ``YYYY-MM-DD`` dates, Twitter's ``created_at`` format and
+    RFC 2822 dates as used by news feeds. Returns None when unparseable.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) / 1000 if value > 1e11 else float(value)
+    if not isinstance(value, str):
+        return None
+
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        try:
+            parsed = datetime.strptime(text, _TWITTER_DATE_FORMAT)
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def utc_date(timestamp: float) -> str:
+    """Format a Unix epoch as a ``YYYY-MM-DD`` date in UTC."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def clean_text(value: Any, limit: int = SNIPPET_MAX_CHARS) -> str:
+    """Collapse whitespace and truncate text to ``limit`` characters."""
+    if not value or not isinstance(value, str):
+        return ""
+    text = re.sub(r"\s+", " ", value).strip()
+    if len(text) > limit:
+        text = text[:limit - 3].rstrip() + "..."
+    return text
+
+
+def to_int(value: Any) -> int:
+    """Best-effort conversion of a count field to int."""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
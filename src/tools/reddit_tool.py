@@ -1,8 +1,7 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Literal
-from apify import Actor
-from src.tools.base import RunApifyActor
+from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Dict, List, Optional, Literal
+from src.tools.base import ApifyScraperTool
+from src.tools.records import ResearchItem, canonical_url, clean_text, parse_timestamp, utc_date, to_int
 
 class RedditScraperInput(BaseModel):
     """Input schema for RedditScraper tool."""
@@ -102,13 +101,32 @@ class RedditScraperInput(BaseModel):
         description="Activate to see detailed logs"
     )
 
-class RedditScraperTool(BaseTool):
+class RedditScraperTool(ApifyScraperTool):
     name: str = "Reddit Scraper"
     description: str = "Tool for scraping Reddit content with configurable parameters"
     args_schema: type[BaseModel] = RedditScraperInput
-    actor: Actor = Field(description="Apify Actor instance")
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-    def _run(
+    actor_id: ClassVar[str] = "trudax/reddit-scraper-lite"
+    dataset_fields: ClassVar[Optional[List[str]]] = [
+        "id", "parsedId", "url", "username", "title", "body", "communityName",
+        "upVotes", "numberOfComments", "createdAt", "dataType"
+    ]
+
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        return ResearchItem(
+            url=canonical_url(item.get("url")),
+            title=clean_text(item.get("title")),
+            snippet=clean_text(item.get("body")),
+            author=clean_text(item.get("username")),
+            source="reddit",
+            engagement=to_int(item.get("upVotes")) + to_int(item.get("numberOfComments")),
+            timestamp=parse_timestamp(item.get("createdAt"))
+        )
+
+    def narrow_since(self, kwargs: Dict[str, Any], since: float) -> Dict[str, Any]:
+        return dict(kwargs, postDateLimit=utc_date(since))
+
+    def _build_run_input(
         self,
         searches: List[str],
         startUrls: Optional[List[str]] = None,
@@ -129,7 +147,7 @@ class RedditScraperTool(BaseTool):
         maxUserCount: Optional[int] = 2,
         scrollTimeout: Optional[int] = 40,
         debugMode: Optional[bool] = False
-    ) -> str:
+    ) -> Dict[str, Any]:
         run_inputs = {}
         
         if startUrls:
@@ -178,6 +196,4 @@ class RedditScraperTool(BaseTool):
         }
         run_inputs["proxy"] = proxy
         
-        run_actor = RunApifyActor(self.actor)
-        dataset = run_actor._run("trudax/reddit-scraper-lite", run_inputs)
-        return dataset
\ No newline at end of file
+        return run_inputs
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Retries and hedged runs for slow or failing Apify actors."""
+import asyncio
+import math
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from src.config.config import (
+    MAX_RETRIES,
+    SCRAPE_HEDGE_DEFAULT_AFTER_SECS,
+    SCRAPE_HEDGE_ENABLED,
+    SCRAPE_HEDGE_MIN_SAMPLES,
+    SCRAPE_HEDGE_WINDOW,
+    SCRAPE_RESILIENCE,
+    SCRAPE_RETRY_BACKOFF_BASE_SECS,
+    SCRAPE_RETRY_BACKOFF_MAX_SECS,
+)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """
+    How runs of one actor are retried and hedged.
+
+    Attributes:
+        retries: Retries after a failed run
+        backoff_base_secs: Upper bound of the wait before the first retry,
+            doubled for every further retry
+        backoff_max_secs: Cap of the wait before a retry
+        hedge: Whether a slow run gets a duplicate run
+        hedge_after_secs: Seconds after which a run counts as slow while too
+            few runs were seen to know the actor's p95 latency
+    """
+    retries: int = MAX_RETRIES
+    backoff_base_secs: float = SCRAPE_RETRY_BACKOFF_BASE_SECS
+    backoff_max_secs: float = SCRAPE_RETRY_BACKOFF_MAX_SECS
+    hedge: bool = SCRAPE_HEDGE_ENABLED
+    hedge_after_secs: float = SCRAPE_HEDGE_DEFAULT_AFTER_SECS
+
+    def backoff(self, retry: int, rng: Optional[random.Random] = None) -> float:
+        """Seconds to wait before retry number ``retry`` (from 0), with full jitter."""
+        ceiling = min(self.backoff_max_secs, self.backoff_base_secs * 2 ** retry)
+        return (rng or random).uniform(0, ceiling)
+
+
+def policy_for(actor_name: str) -> ResiliencePolicy:
+    """The resilience policy of an actor, with its SCRAPE_RESILIENCE overrides."""
+    return ResiliencePolicy(**SCRAPE_RESILIENCE.get(actor_name, {}))
+
+
+class LatencyTracker:
+    """Durations of the recent successful runs of each actor."""
+    def __init__(self, window: int = SCRAPE_HEDGE_WINDOW, min_samples: int = SCRAPE_HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, actor_name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(actor_name, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, actor_name: str) -> Optional[float]:
+        """The actor's p95 run duration, or None while fewer than ``min_samples`` runs were seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(actor_name, ()))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return samples[math.ceil(0.95 * len(samples)) - 1]
+
+    def hedge_after(self, actor_name: str, policy: ResiliencePolicy) -> Optional[float]:
+        """Seconds after which a run of the actor gets a hedge, or None to never hedge."""
+        if not policy.hedge:
+            return None
+        p95 = self.p95(actor_name)
+        return p95 if p95 is not None else policy.hedge_after_secs
+
+
+async def race(attempt: Callable[[], Awaitable[T]], hedge_after: Optional[float]) -> Tuple[T, bool]:
+    """
+    Await ``attempt()``, starting a second one if the first is slow.
+
+    When the first attempt is still running after ``hedge_after`` seconds, a
+    duplicate is started and whichever succeeds first wins; the other one is
+    cancelled, so attempts should clean up (e.g. abort their run) on
+    cancellation. If one attempt fails the other is still awaited, and the
+    error is only raised when both failed.
+
+    Returns:
+        (result, whether a hedge was started)
+    """
+    first = asyncio.ensure_future(attempt())
+    if hedge_after is None:
+        return await first, False
+
+    pending = {first}
+    hedged = False
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            timeout = None if hedged else hedge_after
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                pending.add(asyncio.ensure_future(attempt()))
+                continue
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), hedged
+                error = error or task.exception()
+            if not hedged:
+                # The only attempt failed before it was slow enough to hedge
+                break
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def retrying(
+    call: Callable[[], Awaitable[T]],
+    policy: ResiliencePolicy,
+    on_retry: Optional[Callable[[int], Any]] = None
+) -> T:
+    """
+    Await ``call()``, retrying retryable failures under ``policy``.
+
+    Exceptions with a false ``retryable`` attribute are raised right away, as
+    is the last failure once ``policy.retries`` retries are used up.
+    ``on_retry`` is called with the retry number before each retry.
+    """
+    retry = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if not getattr(e, "retryable", True) or retry >= policy.retries:
+                raise
+        await asyncio.sleep(policy.backoff(retry))
+        retry += 1
+        if on_retry is not None:
+            on_retry(retry)
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide run latency tracker shared by every scraper tool."""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker()
+    return _latency_tracker
@@ -0,0 +1,84 @@
+"""Run many scrapes at once and collect them in completion order."""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Dict, Hashable, List, Optional
+
+
+@dataclass
+class RunResult:
+    """
+    Outcome of one scheduled run.
+
+    Attributes:
+        key: Key the run was started under
+        value: What the run returned, if it succeeded
+        error: Why it failed; an ``asyncio.TimeoutError`` when it timed out
+    """
+    key: Hashable
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, asyncio.TimeoutError)
+
+
+class RunScheduler:
+    """
+    Runs many scrape coroutines at once and hands back their results.
+
+    Every ``submit`` starts its coroutine (usually a tool's ``fetch``) right
+    away as a task of its own, so a phase that submits all its scrapes before
+    collecting any takes as long as its slowest scrape rather than the sum
+    of all of them. ``as_completed`` then yields results as the tasks finish.
+    ``cancel`` and leaving the ``async with`` block only cancel tasks; a
+    tool's Apify run is aborted once no caller is waiting on it any more,
+    so a run shared through single-flight or query batching keeps going
+    while other callers still need it.
+    """
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._collected: List[Hashable] = []
+
+    def submit(self, key: Hashable, work: Awaitable, timeout: Optional[float] = None) -> None:
+        """Start any scrape coroutine, e.g. a tool's ``fetch``, optionally under a timeout."""
+        if key in self._tasks:
+            raise ValueError(f"A run is already scheduled under {key!r}")
+        if timeout is not None:
+            work = asyncio.wait_for(work, timeout)
+        self._tasks[key] = asyncio.ensure_future(work)
+
+    @property
+    def pending(self) -> List[Hashable]:
+        return [key for key, task in self._tasks.items() if not task.done()]
+
+    async def as_completed(self) -> AsyncIterator[RunResult]:
+        """Yield the result of every run not collected yet, in the order they finish."""
+        waiting = {task: key for key, task in self._tasks.items() if key not in self._collected}
+        while waiting:
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = waiting.pop(task)
+                self._collected.append(key)
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                yield RunResult(key, None if error else task.result(), error)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a scrape that is no longer needed; returns whether it was still going."""
+        task = self._tasks.get(key)
+        return task is not None and task.cancel()
+
+    async def cancel_all(self) -> None:
+        """Cancel every scrape still going and wait until they have stopped."""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "RunScheduler":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.cancel_all()
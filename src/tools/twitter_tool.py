@@ -1,8 +1,7 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
-from apify import Actor
-from src.tools.base import RunApifyActor
+from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Dict, List, Optional
+from src.tools.base import ApifyScraperTool
+from src.tools.records import ResearchItem, canonical_url, clean_text, parse_timestamp, utc_date, to_int
 
 class TwitterScraperInput(BaseModel):
     """Input schema for TwitterScraper tool."""
@@ -27,20 +26,43 @@ class TwitterScraperInput(BaseModel):
         default=None
     )
 
-class TwitterScraperTool(BaseTool):
+class TwitterScraperTool(ApifyScraperTool):
     name: str = "Twitter Scraper"
     description: str = "Tool for scraping Twitter content with configurable parameters"
     args_schema: type[BaseModel] = TwitterScraperInput
-    actor: Actor = Field(description="Apify Actor instance")
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    actor_id: ClassVar[str] = "apidojo/twitter-scraper-lite"
+    dataset_fields: ClassVar[Optional[List[str]]] = [
+        "id", "url", "text", "author", "likeCount", "retweetCount",
+        "replyCount", "createdAt"
+    ]
 
-    def _run(
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        author = item.get("author") or {}
+        handle = author.get("userName") if isinstance(author, dict) else author
+        return ResearchItem(
+            url=canonical_url(item.get("url")),
+            snippet=clean_text(item.get("text")),
+            author=f"@{handle}" if handle else "",
+            source="twitter",
+            engagement=(
+                to_int(item.get("likeCount"))
+                + to_int(item.get("retweetCount"))
+                + to_int(item.get("replyCount"))
+            ),
+            timestamp=parse_timestamp(item.get("createdAt"))
+        )
+
+    def narrow_since(self, kwargs: Dict[str, Any], since: float) -> Dict[str, Any]:
+        return dict(kwargs, start=utc_date(since))
+
+    def _build_run_input(
         self,
         searchTerms: Optional[List[str]] = None,
         sort: Optional[str] = "latest",
         start: Optional[str] = None,
         end: Optional[str] = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         run_inputs = {}
         
         if searchTerms:
@@ -53,9 +75,7 @@ class TwitterScraperTool(BaseTool):
         if end:
             run_inputs["end"] = end
 
-        run_actor = RunApifyActor(self.actor)
-        dataset = run_actor._run("apidojo/twitter-scraper-lite", run_inputs)
-        return dataset
+        return run_inputs
 
 
 # from crewai.tools import BaseTool
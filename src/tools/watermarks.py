@@ -0,0 +1,119 @@
+"""Per-topic, per-source watermarks for incremental scraping."""
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from src.config.config import (
+    WATERMARK_BACKEND,
+    WATERMARK_BACKLOG_DAYS,
+    WATERMARK_DIR,
+    WATERMARK_MAX_IDS,
+    WATERMARK_OVERLAP_SECS,
+    WATERMARK_STORE,
+)
+from src.tools.cache import DirectoryTier, KeyValueStoreTier, cache_key
+from src.tools.records import ResearchItem
+
+
+@dataclass
+class Watermark:
+    """
+    What earlier runs already fetched for one topic and source.
+
+    Attributes:
+        last_seen: Newest item timestamp seen so far (Unix epoch)
+        seen_ids: URLs of items already fetched, newest first
+        backlog: Items from earlier runs still inside the backlog window
+    """
+    last_seen: Optional[float] = None
+    seen_ids: List[str] = field(default_factory=list)
+    backlog: List[Dict] = field(default_factory=list)
+
+    @property
+    def since(self) -> Optional[float]:
+        """Start of the window the next run has to scrape, or None for a full scrape."""
+        if self.last_seen is None:
+            return None
+        return self.last_seen - WATERMARK_OVERLAP_SECS
+
+    def merge(
+        self,
+        items: List[ResearchItem],
+        now: Optional[float] = None,
+        complete: bool = True
+    ) -> List[ResearchItem]:
+        """
+        Merge freshly scraped items with the backlog and advance the watermark.
+
+        An incomplete scrape (stopped early, or cut short by the time budget)
+        may have missed items older than the ones it returned, so the
+        watermark moves no further than its oldest item and the next run
+        scrapes the rest of the window again.
+
+        Args:
+            items: Records returned by the narrowed scrape
+            now: Current time, used to age out the backlog
+            complete: Whether the scrape read everything its run produced
+
+        Returns:
+            New items first, followed by backlog items still in the window
+        """
+        now = now or time.time()
+        seen = set(self.seen_ids)
+        fresh = []
+        for item in items:
+            if item.url not in seen:
+                seen.add(item.url)
+                fresh.append(item)
+
+        cutoff = now - WATERMARK_BACKLOG_DAYS * 86400
+        backlog = [
+            ResearchItem(**entry) for entry in self.backlog
+            if (entry.get("timestamp") or now) >= cutoff
+        ]
+        fresh_urls = {item.url for item in fresh}
+        merged = fresh + [item for item in backlog if item.url not in fresh_urls]
+
+        timestamps = [item.timestamp for item in items if item.timestamp is not None]
+        if timestamps:
+            newest = max(timestamps) if complete else min(timestamps)
+            self.last_seen = max(self.last_seen or 0.0, newest)
+        elif items and complete:
+            # Sources without dates still advance, so the next run is narrowed too
+            self.last_seen = max(self.last_seen or 0.0, now)
+        self.seen_ids = ([item.url for item in fresh] + self.seen_ids)[:WATERMARK_MAX_IDS]
+        self.backlog = [asdict(item) for item in merged[:WATERMARK_MAX_IDS]]
+        return merged
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class WatermarkStore:
+    """Loads and saves watermarks in a persistent cache tier."""
+    def __init__(self, persistent):
+        self.persistent = persistent
+
+    @staticmethod
+    def key(topic: str, source: str) -> str:
+        return cache_key("watermark", " ".join(topic.lower().split()), source)
+
+    async def load(self, topic: str, source: str) -> Watermark:
+        try:
+            data = await self.persistent.get(self.key(topic, source))
+        except Exception:
+            data = None
+        return Watermark(**data) if data else Watermark()
+
+    async def save(self, topic: str, source: str, watermark: Watermark) -> None:
+        await self.persistent.set(self.key(topic, source), watermark.to_dict())
+
+
+def create_watermark_store(actor) -> WatermarkStore:
+    """
+    Create a watermark store backed by WATERMARK_BACKEND: "kvs" for the named
+    Actor key-value store or "dir" for WATERMARK_DIR.
+    """
+    if WATERMARK_BACKEND == "dir":
+        return WatermarkStore(DirectoryTier(WATERMARK_DIR))
+    return WatermarkStore(KeyValueStoreTier(actor, WATERMARK_STORE))
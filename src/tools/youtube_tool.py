@@ -1,8 +1,9 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
-from apify import Actor
-from src.tools.base import RunApifyActor
+import math
+import time
+from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Dict, List, Optional
+from src.tools.base import ApifyScraperTool
+from src.tools.records import ResearchItem, canonical_url, clean_text, parse_timestamp, to_int
 
 class YouTubeScraperInput(BaseModel):
     """Input schema for YouTubeScraper tool."""
@@ -141,14 +142,34 @@ class YouTubeScraperInput(BaseModel):
         default=None
     )
 
-class YouTubeScraperTool(BaseTool):
+class YouTubeScraperTool(ApifyScraperTool):
     name: str = "YouTube Scraper"
     description: str = "Tool for scraping YouTube videos, channels, playlists with configurable parameters"
     args_schema: type[BaseModel] = YouTubeScraperInput
-    actor: Actor = Field(description="Apify Actor instance")
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    actor_id: ClassVar[str] = "streamers/youtube-scraper"
+    dataset_fields: ClassVar[Optional[List[str]]] = [
+        "id", "title", "url", "channelName", "text", "viewCount", "likes", "date",
+        "duration"
+    ]
 
-    def _run(
+    @staticmethod
+    def normalize_item(item: Dict) -> Optional[ResearchItem]:
+        return ResearchItem(
+            url=canonical_url(item.get("url")),
+            title=clean_text(item.get("title")),
+            snippet=clean_text(item.get("text")),
+            author=clean_text(item.get("channelName")),
+            source="youtube",
+            engagement=to_int(item.get("viewCount")),
+            timestamp=parse_timestamp(item.get("date"))
+        )
+
+    def narrow_since(self, kwargs: Dict[str, Any], since: float) -> Dict[str, Any]:
+        # Rounded first so a window of exactly N days computed a moment ago stays N days
+        days = max(1, math.ceil(round((time.time() - since) / 86400, 3)))
+        return dict(kwargs, scrapeLastNDays=days)
+
+    def _build_run_input(
         self,
         searchQueries: Optional[List[str]] = None,
         maxResultsShorts: Optional[int] = 0,
@@ -177,7 +198,7 @@ class YouTubeScraperTool(BaseTool):
         oldestPostDate: Optional[str] = None,
         scrapeLastNDays: Optional[int] = None,
         sortVideosBy: Optional[str] = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         run_inputs = {}
         
         if searchQueries:
@@ -236,7 +257,5 @@ class YouTubeScraperTool(BaseTool):
         if sortVideosBy:
             run_inputs["sortVideosBy"] = sortVideosBy
             
-        run_actor = RunApifyActor(self.actor)
-        dataset = run_actor._run("streamers/youtube-scraper", run_inputs)
-        return dataset
+        return run_inputs
 